@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Headless benchmarks of the environment throughput
+
+Usage :
+	python benchmark.py --output results.json
+	python benchmark.py --output new.json --compare results.json
+	python benchmark.py --check
+"""
+# ---------------------------------------------------------------------------
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from wind_turbine import Wind_turbine, Wind
+from simu import Basic_agent, Random_agent, Simu
+
+# Published median latency targets of the single environment steps at 1s, in us. They are checked with --check
+latency_targets = {'wind_step_duration_1': 10,
+				   'wind_turbine_no_inertia': 5,
+				   'wind_turbine_inertia': 10,
+				   'simu_Basic_agent': 30}
+
+
+def time_calls(func, n_calls:int) -> dict:
+	'''
+	Calls func n_calls times and returns the throughput and the latency percentiles of a call. func is called once more
+	before, untimed, so it must support n_calls + 1 calls
+	'''
+	latencies = np.zeros(n_calls)
+	clock = time.perf_counter
+	# Untimed warm-up call, e.g. scipy is imported on the first filtered step
+	func()
+	start = clock()
+	for i in range(n_calls):
+		t = clock()
+		func()
+		latencies[i] = clock() - t
+	total = clock() - start
+	return {'steps_per_s': n_calls / total,
+			'latency_p50_us': np.percentile(latencies, 50) * 1e6,
+			'latency_p90_us': np.percentile(latencies, 90) * 1e6,
+			'latency_p99_us': np.percentile(latencies, 99) * 1e6,
+			'latency_max_us': np.max(latencies) * 1e6}
+
+
+def bench_wind(n_steps:int, step_duration:float) -> dict:
+	wd = Wind(10, 270, step_duration, 'OU', rng=np.random.default_rng(0))
+	return time_calls(wd.step, n_steps)
+
+
+def bench_wind_turbine(n_steps:int, has_inertia:bool) -> dict:
+	wt = Wind_turbine(270, has_inertia)
+	rng = np.random.default_rng(0)
+	speeds = rng.uniform(0, 25, n_steps + 1).tolist()
+	headings = rng.uniform(250, 290, n_steps + 1).tolist()
+	actions = rng.integers(0, 3, n_steps + 1).tolist()
+	inputs = iter(zip(speeds, headings, actions))
+	return time_calls(lambda: wt.step(*next(inputs)), n_steps)
+
+
+def bench_simu(n_steps:int, agent_class) -> dict:
+	'''
+	Runs a whole simulation, the latency is the one of Simu.step and the peak memory is the one of the simulation,
+	logs included
+	'''
+	agent = agent_class(rng=np.random.default_rng(1)) if agent_class is Random_agent else agent_class()
+	tracemalloc.start()
+	sm = Simu(agent, Wind(10, 270, 1, 'OU', rng=np.random.default_rng(0)), Wind_turbine(270, True), n_steps + 1)
+	log_bytes = sum(log.nbytes for log in sm.logs.values())
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	def step():
+		sm.step()
+		sm.step_count += 1
+	result = time_calls(step, n_steps)
+	result['log_memory_mb'] = log_bytes / 1e6
+	result['peak_memory_mb'] = peak / 1e6
+	return result
+
+
+def git_commit() -> str:
+	try:
+		return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, \
+			check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return 'unknown'
+
+
+def run_benchmarks(n_steps:int) -> dict:
+	benchmarks = {}
+	for step_duration in (1, 10, 60):
+		benchmarks['wind_step_duration_' + str(step_duration)] = bench_wind(n_steps, step_duration)
+	benchmarks['wind_turbine_no_inertia'] = bench_wind_turbine(n_steps, False)
+	benchmarks['wind_turbine_inertia'] = bench_wind_turbine(n_steps, True)
+	for agent_class in (Basic_agent, Random_agent):
+		benchmarks['simu_' + agent_class.__name__] = bench_simu(n_steps, agent_class)
+	return {'commit': git_commit(),
+			'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+			'python': platform.python_version(),
+			'numpy': np.__version__,
+			'n_steps': n_steps,
+			'benchmarks': benchmarks}
+
+
+def compare(results:dict, reference:dict) -> str:
+	'''
+	Table of the throughput and median latency of results relative to reference, a ratio above 1 is faster
+	'''
+	lines = ['%-28s %14s %14s %8s %12s' % ('benchmark', 'steps/s', 'ref steps/s', 'speedup', 'p50 ratio')]
+	for name, result in results['benchmarks'].items():
+		if name not in reference['benchmarks']:
+			continue
+		ref = reference['benchmarks'][name]
+		lines.append('%-28s %14.0f %14.0f %8.2f %12.2f' % (name, result['steps_per_s'], ref['steps_per_s'], \
+			result['steps_per_s'] / ref['steps_per_s'], ref['latency_p50_us'] / result['latency_p50_us']))
+	return '\n'.join(lines)
+
+
+def check_targets(results:dict) -> list:
+	'''
+	The benchmarks whose median latency is above its target
+	'''
+	return [name for name, target in latency_targets.items() \
+		if name in results['benchmarks'] and results['benchmarks'][name]['latency_p50_us'] > target]
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmarks of the wind turbine environment')
+	parser.add_argument('--steps', type=int, default=20000, help='number of steps of each benchmark')
+	parser.add_argument('--output', help='json file where the results are written')
+	parser.add_argument('--compare', help='json file of reference results, e.g. from another commit')
+	parser.add_argument('--check', action='store_true', help='exit with an error if a latency target is missed')
+	args = parser.parse_args()
+
+	results = run_benchmarks(args.steps)
+	for name, result in results['benchmarks'].items():
+		print('%-28s %12.0f steps/s  p50 %8.1f us  p99 %8.1f us' % (name, result['steps_per_s'], \
+			result['latency_p50_us'], result['latency_p99_us']))
+	if args.output is not None:
+		with open(args.output, 'w') as f:
+			json.dump(results, f, indent=2)
+	if args.compare is not None:
+		with open(args.compare) as f:
+			print(compare(results, json.load(f)))
+	if args.check:
+		missed = check_targets(results)
+		for name, target in latency_targets.items():
+			print('%-28s p50 %8.1f us  target %6.1f us  %s' % (name, results['benchmarks'][name]['latency_p50_us'], target, \
+				'missed' if name in missed else 'ok'))
+		if len(missed) > 0:
+			sys.exit(1)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" check that importing the environment is fast and does not load scipy """
+# ---------------------------------------------------------------------------
+import os
+import subprocess
+import sys
+
+
+modules = ['wind_turbine', 'simu']
+budget = 0.05 				# s, import time of the modules once numpy is imported
+n_runs = 5
+
+# Each run is a fresh interpreter, numpy is imported first since every user pays for it anyway
+code = 'import sys, time, numpy\n' \
+	+ 't = time.perf_counter()\n' \
+	+ ''.join('import ' + module + '\n' for module in modules) \
+	+ 'print(time.perf_counter() - t, "scipy" in sys.modules)'
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+times = []
+for _ in range(n_runs):
+	output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True).stdout.split()
+	times.append(float(output[0]))
+	scipy_loaded = output[1] == 'True'
+
+print('import time of %s : best %.1f ms, worst %.1f ms, budget %.1f ms' % (', '.join(modules), 1e3 * min(times), \
+	1e3 * max(times), 1e3 * budget))
+print('scipy loaded at import :', scipy_loaded)
+if min(times) > budget or scipy_loaded:
+	sys.exit('import time check failed')
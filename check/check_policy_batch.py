@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" check that the batched policies return integer actions, the same as the scalar policies """
+# ---------------------------------------------------------------------------
+import sys
+import numpy as np
+from simu import Basic_agent, Random_agent
+
+
+rel_wind_headings = np.random.default_rng(0).uniform(-60, 60, (50, 3))
+failed = False
+for name, agent, scalar_agent in (('Basic_agent', Basic_agent(), Basic_agent()), \
+	('Random_agent', Random_agent(rng=1), Random_agent(rng=1))):
+	# Several calls, so that the random draws are taken across the prefetched blocks
+	actions = np.concatenate([agent.policy_batch(rel_wind_headings) for _ in range(100)])
+	scalar_actions = np.array([[scalar_agent.policy(h) for h in row] for _ in range(100) for row in rel_wind_headings])
+	is_int = np.issubdtype(actions.dtype, np.integer)
+	same = np.array_equal(actions, scalar_actions)
+	print('%-12s : dtype %s, same actions as policy : %s' % (name, actions.dtype, same))
+	failed |= not is_int or not same
+
+if failed:
+	sys.exit('policy_batch check failed')
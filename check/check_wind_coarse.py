@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" check that the coarse step wind has the distribution of the substep loop """
+# ---------------------------------------------------------------------------
+import sys
+import numpy as np
+from scipy.stats import ks_2samp
+from wind_turbine import Wind
+
+
+n_runs = 2000
+n_steps = 24*60
+step_duration = 60
+check_steps = [0, 9, 99, n_steps-1]
+# Thresholds of the check, the distributions are the same within the sampling error of n_runs runs
+min_p_value = 1e-3 				# KS p-value
+mean_tolerance = 4 				# standard errors of the difference of the means
+std_tolerance = 0.1 			# relative difference of the standard deviations
+correlation_tolerance = 0.1 	# difference of the lag-1 correlations
+
+rng = np.random.default_rng(0)
+loop_sp = np.zeros((n_runs, n_steps))
+loop_h = np.zeros((n_runs, n_steps))
+coarse_sp = np.zeros((n_runs, n_steps))
+coarse_h = np.zeros((n_runs, n_steps))
+for r in range(n_runs):
+	loop_sp[r], loop_h[r] = Wind(10, 270, step_duration, 'OU', rng=rng).generate(n_steps)
+	coarse_sp[r], coarse_h[r] = Wind(10, 270, step_duration, 'OU', rng=rng, coarse_step=True).generate(n_steps)
+
+failures = []
+
+# Marginal distributions at a few steps
+for t in check_steps:
+	for name, loop, coarse in (('speed  ', loop_sp[:, t], coarse_sp[:, t]), ('heading', loop_h[:, t], coarse_h[:, t])):
+		p_value = ks_2samp(loop, coarse).pvalue
+		print('step %4d %s : mean %7.3f / %7.3f  std %6.3f / %6.3f  KS p-value %.3f' % (t, name, np.mean(loop), \
+			np.mean(coarse), np.std(loop), np.std(coarse), p_value))
+		mean_error = np.sqrt((np.var(loop) + np.var(coarse)) / n_runs)
+		if p_value < min_p_value or abs(np.mean(loop) - np.mean(coarse)) > mean_tolerance * mean_error \
+			or abs(np.std(coarse) / np.std(loop) - 1) > std_tolerance:
+			failures.append('step %d %s' % (t, name.strip()))
+
+# Step to step correlation
+for name, loop, coarse in (('speed  ', loop_sp, coarse_sp), ('heading', loop_h, coarse_h)):
+	loop_correlation = np.corrcoef(loop[:, 99], loop[:, 100])[0, 1]
+	coarse_correlation = np.corrcoef(coarse[:, 99], coarse[:, 100])[0, 1]
+	print('%s lag-1 correlation : %.3f / %.3f' % (name, loop_correlation, coarse_correlation))
+	if abs(loop_correlation - coarse_correlation) > correlation_tolerance:
+		failures.append(name.strip() + ' lag-1 correlation')
+
+if len(failures) > 0:
+	sys.exit('coarse step wind check failed : ' + ', '.join(failures))
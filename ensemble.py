@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Monte Carlo evaluation of agents over many wind realizations """
+# ---------------------------------------------------------------------------
+import inspect
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from wind_turbine import Wind_turbine, Wind
+from simu import Simu
+
+# Logged channels needed to summarize a simulation
+summary_channels = ('power_output', 'action', 'true_rel_wind_heading')
+
+
+def make_agent(agent_class, rng):
+	'''
+	Instantiate an agent, the random generator is given to the agents that accept a rng argument
+	'''
+	if 'rng' in inspect.signature(agent_class).parameters:
+		return agent_class(rng=rng)
+	return agent_class()
+
+
+def job_seeds(seed, i_wind_config, i_seed):
+	'''
+	Random generators of the wind and of the agent of a job. They only depend on the root seed, the wind
+	configuration and the realization, so all the agents are evaluated against the same winds
+	'''
+	wind_seed, agent_seed = np.random.SeedSequence(seed, spawn_key=(i_wind_config, i_seed)).spawn(2)
+	return np.random.default_rng(wind_seed), np.random.default_rng(agent_seed)
+
+
+def run_job(job):
+	'''
+	Run one simulation and summarize it
+	Input  : a tuple (agent_class, wind_config, turbine_config, max_steps, seed, i_wind_config, i_seed, keep_power)
+	Output : a dict with the energy, the yaw action count, the misalignment and optionally the power output
+	'''
+	agent_class, wind_config, turbine_config, max_steps, seed, i_wind_config, i_seed, keep_power = job
+	wind_rng, agent_rng = job_seeds(seed, i_wind_config, i_seed)
+	wd = Wind(**wind_config, rng=wind_rng)
+	wt = Wind_turbine(**turbine_config)
+	max_steps = int(np.ceil(24*3600 / wd.step_duration)) if max_steps is None else max_steps
+	sm = Simu(make_agent(agent_class, agent_rng), wd, wt, max_steps, log_channels=summary_channels)
+	sm.run_simu()
+	return summarize(sm, keep_power)
+
+
+def summarize(sm, keep_power=False):
+	'''
+	Summary of a simulation that has run with at least the summary_channels logged
+	Output : a dict with the energy, the yaw action count, the misalignment and optionally the power output
+	'''
+	misalignment = np.abs(sm.true_rel_wind_heading_log.astype(float))
+	result = {'energy': sm.energy,
+			  'yaw_actions': np.count_nonzero(sm.action_log != 1),
+			  'mean_misalignment': np.mean(misalignment),
+			  'max_misalignment': np.max(misalignment)}
+	if keep_power:
+		result['power_output'] = sm.power_output_log
+	return result
+
+
+def run_ensemble(agent_classes, wind_configs, n_seeds, seed=0, turbine_config=None, max_steps=None, \
+	n_workers=None, keep_power=False):
+	'''
+	Run every (agent, wind configuration, realization) simulation, sharded across a pool of processes.
+	Each job has its own random generators derived from the root seed, so the results are the same
+	whatever the number of workers.
+	Inputs :
+		agent_classes 	- The agent classes to evaluate, e.g. [Basic_agent, Random_agent]
+		wind_configs 	- The Wind arguments of each configuration, e.g. [{'initial_speed': 10, 'initial_heading': 270, 'step_duration': 60}]
+		n_seeds 		- [] The number of wind realizations per configuration
+		seed 			- [] The root seed
+		turbine_config 	- The Wind_turbine arguments, e.g. {'initial_estimated_heading': 270, 'has_inertia': True}
+		max_steps 		- [] The number of steps of each simulation, 24h by default
+		n_workers 		- [] The number of processes, the jobs are run in the current process if it is 1.
+						  By default it is the number of processors
+		keep_power 		- [bool] Whether the power output of each simulation is returned
+	Outputs :
+		results 		- A dict of arrays of shape (n_agents, n_wind_configs, n_seeds) :
+						  'energy' [MWh], 'yaw_actions', 'mean_misalignment' [deg] and 'max_misalignment' [deg]
+						  of the true relative wind, and 'power_output' [MW] the float32 power logs if keep_power
+	'''
+	turbine_config = {} if turbine_config is None else turbine_config
+	shape = (len(agent_classes), len(wind_configs), n_seeds)
+	jobs = [(agent_class, wind_config, turbine_config, max_steps, seed, i_wind_config, i_seed, keep_power) \
+		for agent_class in agent_classes \
+		for i_wind_config, wind_config in enumerate(wind_configs) \
+		for i_seed in range(n_seeds)]
+
+	n_workers = os.cpu_count() if n_workers is None else n_workers
+	if n_workers == 1:
+		job_results = [run_job(job) for job in jobs]
+	else:
+		with ProcessPoolExecutor(max_workers=n_workers) as executor:
+			job_results = list(executor.map(run_job, jobs, chunksize=max(1, len(jobs) // (4 * n_workers))))
+
+	results = {name: np.reshape([job_result[name] for job_result in job_results], shape) \
+		for name in ('energy', 'yaw_actions', 'mean_misalignment', 'max_misalignment')}
+	if keep_power:
+		results['power_output'] = np.empty(shape, dtype=object)
+		for i, job_result in enumerate(job_results):
+			results['power_output'].flat[i] = job_result['power_output']
+	return results
@@ -7,15 +7,34 @@
 """ Digital butterworth filter """
 # ----------------------------------------------------------------------
 
+import functools
 import numpy as np
-from scipy.signal import butter, lfilter, freqz
+
+# scipy.signal takes about a second to import, so it is only imported by the
+# functions that need it, when they are first called
 
 def butter_lowpass(cutoff, fs, order=5):
+    """Coefficients of a butterworth low-pass filter, designed once per (cutoff, fs, order).
+
+    The cached coefficients are shared, they are read-only arrays.
+    """
+    return _butter_lowpass(float(cutoff), float(fs), int(order))
+
+@functools.lru_cache(maxsize=None)
+def _butter_lowpass(cutoff, fs, order):
+    from scipy.signal import butter
     nyq = 0.5 * fs
     normal_cutoff = cutoff / nyq
     b, a = butter(order, normal_cutoff, btype='low', analog=False)
+    b.setflags(write=False)
+    a.setflags(write=False)
     return b, a
 
+def lfilter(b, a, x, axis=-1, zi=None):
+    """scipy.signal.lfilter, scipy is imported on the first call."""
+    from scipy.signal import lfilter
+    return lfilter(b, a, x, axis=axis, zi=zi)
+
 def butter_lowpass_filter(data, cutoff, fs, order=5):
     b, a = butter_lowpass(cutoff, fs, order=order)
     y = lfilter(b, a, data)
@@ -52,3 +71,143 @@ def manual_filter(b, a, input, init=[]):
         else:
             y[i] = init[i]
     return y 
+
+
+class Streaming_filter:
+    """Bank of digital filters processed one sample at a time.
+
+    Each filter keeps its own state in the transposed direct form II used by
+    scipy.signal.lfilter, so an update costs O(order) whatever the length of the
+    signal. The first order + 1 samples of each filter output their running mean,
+    then the filter starts from this mean as in manual_filter.
+
+    Keyword arguments:
+    b -- the numerator of a filter [double]
+    a -- the denominator of a filter [double]
+    n_filters -- the number of filters in the bank [int]
+
+    ex :
+    lp = Streaming_filter(*butter_lowpass(1/60, 1.0, 1), n_turbines)
+    y = lp.update(x) to filter one sample of each of the n_turbines signals
+    """
+
+    def __init__(self, b, a, n_filters=1):
+        self.b = np.asarray(b, dtype=float) / a[0]
+        self.a = np.asarray(a, dtype=float) / a[0]
+        self.order = len(self.a) - 1
+        self.__b = self.b.tolist()
+        self.__a = self.a.tolist()
+        self.n_filters = n_filters
+        self.__z = np.zeros((n_filters, self.order))
+        self.__x_init = np.zeros((n_filters, self.order + 1))
+        self.__sum_init = np.zeros(n_filters)
+        self.__count = np.zeros(n_filters, dtype=int)
+
+    def update(self, x):
+        """Filters one sample of each filter of the bank.
+
+        Keyword arguments:
+        x -- the new sample of each filter [np.array of size n_filters]
+
+        Output:
+        y -- the filtered sample of each filter [np.array of size n_filters]
+        """
+        x = np.broadcast_to(np.asarray(x, dtype=float), (self.n_filters,))
+        init = self.__count <= self.order
+        # Transposed direct form II, the operations are the ones of scipy.signal.lfilter
+        y = self.__z[:, 0] + self.b[0] * x if self.order > 0 else self.b[0] * x
+        for i in range(self.order - 1):
+            self.__z[:, i] = self.__z[:, i + 1] + x * self.b[i + 1] - y * self.a[i + 1]
+        if self.order > 0:
+            self.__z[:, -1] = x * self.b[-1] - y * self.a[-1]
+        if np.any(init):
+            y = np.where(init, self.__init_update(x, init), y)
+        return y
+
+    def update_scalar(self, x):
+        """Same as update for a bank of a single filter, with python floats that avoid the numpy overhead.
+
+        Keyword arguments:
+        x -- the new sample [float]
+
+        Output:
+        y -- the filtered sample [float]
+        """
+        if self.__count[0] <= self.order or self.order == 0:
+            return float(self.update(x)[0])
+        b, a, z = self.__b, self.__a, self.__z[0].tolist()
+        # The operations of update, in the same order
+        y = z[0] + b[0] * x
+        for i in range(self.order - 1):
+            z[i] = z[i + 1] + x * b[i + 1] - y * a[i + 1]
+        z[-1] = x * b[-1] - y * a[-1]
+        self.__z[0] = z
+        return y
+
+    def update_block(self, x):
+        """Filters successive samples of each filter of the bank, same as calling update on each row of x.
+
+        Keyword arguments:
+        x -- the successive samples of each filter [np.array of size n_samples x n_filters]
+
+        Output:
+        y -- the filtered samples [np.array of size n_samples x n_filters]
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.zeros(x.shape)
+        # The first samples of a filter output their running mean, they are filtered one at a time
+        i = 0
+        while i < len(x) and np.any(self.__count <= self.order):
+            y[i] = self.update(x[i])
+            i += 1
+        if i < len(x) and self.order > 0:
+            # scipy.signal.lfilter runs the same transposed direct form II operations as update
+            y[i:], z = lfilter(self.b, self.a, x[i:], axis=0, zi=self.__z.T)
+            self.__z = np.ascontiguousarray(z.T)
+        elif i < len(x):
+            y[i:] = self.b[0] * x[i:]
+        return y
+
+    def __init_update(self, x, init):
+        """Running mean of the first samples, the filter state is set once order + 1 samples are known."""
+        rows = np.nonzero(init)[0]
+        self.__x_init[rows, self.__count[rows]] = x[rows]
+        self.__sum_init[rows] += x[rows]
+        self.__count[rows] += 1
+        mean = np.zeros(self.n_filters)
+        mean[rows] = self.__sum_init[rows] / self.__count[rows]
+        ready = rows[self.__count[rows] > self.order]
+        if len(ready) > 0:
+            # Delays of a filter whose past outputs all equal the mean and whose past inputs are the first samples
+            x_hist = self.__x_init[ready]
+            y_hist = mean[ready, None]
+            for i in range(self.order):
+                k = np.arange(i + 1, self.order + 1)
+                self.__z[ready, i] = np.sum(self.b[k] * x_hist[:, self.order + i + 1 - k] - self.a[k] * y_hist, axis=1)
+        return mean
+
+    def snapshot(self):
+        """Returns a copy of the state of the filters, to be given to restore."""
+        return (self.__z.copy(), self.__x_init.copy(), self.__sum_init.copy(), self.__count.copy())
+
+    def restore(self, state):
+        """Sets the state of the filters from a snapshot."""
+        z, x_init, sum_init, count = state
+        self.__z = z.copy()
+        self.__x_init = x_init.copy()
+        self.__sum_init = sum_init.copy()
+        self.__count = count.copy()
+
+    def copy(self):
+        """Returns an independent copy of the bank of filters."""
+        copy = Streaming_filter.__new__(Streaming_filter)
+        copy.__dict__.update(self.__dict__)
+        copy.restore(self.snapshot())
+        return copy
+
+    def reset(self, mask=None):
+        """Restarts the filters selected by mask [np.array of bool], all of them by default."""
+        mask = np.ones(self.n_filters, dtype=bool) if mask is None else mask
+        self.__z[mask] = 0
+        self.__sum_init[mask] = 0
+        self.__count[mask] = 0
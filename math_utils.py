@@ -7,6 +7,7 @@
 """ Useful tools """
 # ---------------------------------------------------------------------------
 
+import copy
 import numpy as np
 
 def wrap_to_m180_p180(angle_in_degree : float) -> float :
@@ -15,5 +16,107 @@ def wrap_to_m180_p180(angle_in_degree : float) -> float :
 	Input: angle in degree (float)
 	Output: angle in degree in range [-180, 180] (float)
 	"""
+	if isinstance(angle_in_degree, (float, int)):
+		# Python floats avoid the numpy overhead on scalars, % is the same floored modulo as np.mod
+		return (angle_in_degree + 180) % 360 - 180
 	return np.mod(angle_in_degree + 180, 360) - 180
 
+
+def get_rng_state(rng):
+	"""
+	Get the state of a random generator
+	Input: a numpy Generator, a RandomState or the numpy.random module
+	Output: the state that can be given to set_rng_state
+	"""
+	if isinstance(rng, np.random.Generator):
+		return rng.bit_generator.state
+	return rng.get_state()
+
+def set_rng_state(rng, state):
+	"""
+	Set the state of a random generator
+	Input: a numpy Generator, a RandomState or the numpy.random module, and a state from get_rng_state
+	"""
+	if isinstance(rng, np.random.Generator):
+		rng.bit_generator.state = state
+	else:
+		rng.set_state(state)
+
+def copy_rng(rng):
+	"""
+	Copy a random generator, the copy draws the same numbers as the original but independently of it
+	Input: a numpy Generator, a RandomState or the numpy.random module
+	Output: a numpy Generator or a RandomState
+	"""
+	if isinstance(rng, np.random.Generator):
+		copy = np.random.Generator(type(rng.bit_generator)(0))
+	else:
+		copy = np.random.RandomState()
+	set_rng_state(copy, get_rng_state(rng))
+	return copy
+
+def make_rng(rng=None):
+	"""
+	Random generator of an rng argument
+	Input: None for the global numpy random state, a seed or a SeedSequence for a new numpy Generator,
+	       or a numpy Generator or RandomState that is used as is
+	Output: a numpy Generator, a RandomState or the numpy.random module
+	"""
+	if rng is None:
+		return np.random
+	if isinstance(rng, (int, np.integer, np.random.SeedSequence)):
+		return np.random.default_rng(rng)
+	return rng
+
+
+class Prefetched_draws:
+	"""
+	Draws of a random generator prefetched by blocks and consumed by an index, so that the many small draws of a
+	simulation do not each pay the dispatch of a generator call. The draws are the same as the successive calls
+	getattr(rng, method)(*args, size=n) would give, but the generator is ahead of them by up to a block
+	"""
+	def __init__(self, rng, method:str, *args, block_size:int=4096):
+		"""
+		Input: a numpy Generator, a RandomState or the numpy.random module, the name of the drawing method, e.g.
+		       'standard_normal', its arguments and the number of draws prefetched at once
+		"""
+		self.rng = rng
+		self.method = method
+		self.args = args
+		self.block_size = block_size
+		self.__buffer = np.zeros(0)
+		self.__index = 0
+
+	def take(self, n_draws:int) -> np.ndarray:
+		"""
+		Output: the next n_draws draws, a read-only array
+		"""
+		if self.__index + n_draws > len(self.__buffer):
+			rest = self.__buffer[self.__index:]
+			block = getattr(self.rng, self.method)(*self.args, size=max(self.block_size, n_draws - len(rest)))
+			# The buffer is never modified in place, so that the states can share it. The block is taken as is when
+			# nothing is left, so the buffer has the dtype of the draws, e.g. int for 'choice'
+			self.__buffer = block if len(rest) == 0 else np.concatenate((rest, block))
+			self.__buffer.flags.writeable = False
+			self.__index = 0
+		draws = self.__buffer[self.__index:self.__index + n_draws]
+		self.__index += n_draws
+		return draws
+
+	def get_state(self):
+		"""
+		Output: the state of the generator and of the prefetched draws, that can be given to set_state
+		"""
+		return (get_rng_state(self.rng), self.__buffer, self.__index)
+
+	def set_state(self, state):
+		rng_state, self.__buffer, self.__index = state
+		set_rng_state(self.rng, rng_state)
+
+	def copy(self):
+		"""
+		Output: an independent copy, with a copy of the generator, that gives the same draws
+		"""
+		draws = copy.copy(self)
+		draws.rng = copy_rng(self.rng)
+		return draws
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Constant memory statistics of long simulations
+
+Usage :
+	stats = Online_stats()
+	sm = Simu(agent, wind, wind_turbine, max_steps=np.inf, log_channels=(), stats=stats)
+	sm.run_simu(stop=lambda sm: sm.time >= 365*24*3600, check_every=3600)
+	print(stats.summary())
+"""
+# ---------------------------------------------------------------------------
+import numpy as np
+
+
+class Online_stats:
+	'''
+	Accumulators of the steps of a simulation that do not grow with its length : energy, yaw actions and their cost,
+	time above the yaw cut-off, time-weighted mean and variance of the power (Welford's algorithm) and a histogram of
+	the time spent per true and estimated misalignment. The steps are weighted by their duration, so the statistics
+	are the same with adaptive steps.
+	'''
+	def __init__(self, yaw_cut_off:float=None, yaw_control_cost:float=None, histogram_limit:float=45, \
+		histogram_resolution:float=1):
+		'''
+		Inputs :
+			yaw_cut_off 			- [deg] The true misalignment above which the time is counted, the one of the wind
+									  turbine of the simulation by default
+			yaw_control_cost 		- [MW] The power cost of an action, the one of the wind turbine of the simulation by default
+			histogram_limit 		- [deg] The histogram covers [-histogram_limit, histogram_limit] on both axes, the
+									  misalignments outside are counted in the edge bins
+			histogram_resolution 	- [deg] The width of the bins of the histogram
+		'''
+		self.yaw_cut_off = yaw_cut_off
+		self.yaw_control_cost = yaw_control_cost
+		self.histogram_limit = histogram_limit
+		self.histogram_resolution = histogram_resolution
+		self.n_bins = int(np.ceil(2 * histogram_limit / histogram_resolution))
+		self.reset()
+
+	def reset(self):
+		self.n_steps = 0
+		self.time = 0.0 				# s
+		self.energy = 0.0 				# MWh
+		self.yaw_actions = 0
+		self.yaw_cost = 0.0 			# MWh, the energy spent on the actions
+		self.time_above_cut_off = 0.0 	# s
+		self.__power_mean = 0.0 		# MW
+		self.__power_m2 = 0.0 			# MW^2.s, the time-weighted sum of the squared deviations
+		# Time spent per (true, estimated) misalignment bin
+		self.histogram = np.zeros((self.n_bins, self.n_bins)) 	# s
+
+	def attach(self, wind_turbine):
+		'''
+		Takes the yaw cut-off and control cost of a wind turbine when they are not given
+		'''
+		if self.yaw_cut_off is None:
+			self.yaw_cut_off = wind_turbine.yaw_cut_off
+		if self.yaw_control_cost is None:
+			self.yaw_control_cost = wind_turbine.yaw_control_cost
+
+	def add(self, power_output:float, action:int, rel_wind_heading:float, true_rel_wind_heading:float, duration:float):
+		'''
+		Adds one step
+		Inputs :
+			power_output 			- [MW] The power output of the step
+			action 					- {0, 1, 2} The action of the step
+			rel_wind_heading 		- [deg] The estimated relative wind heading seen by the agent
+			true_rel_wind_heading 	- [deg] The true relative wind heading
+			duration 				- [s] The duration of the step
+		'''
+		self.n_steps += 1
+		self.time += duration
+		self.energy += power_output * duration / 3600
+		if action != 1:
+			self.yaw_actions += 1
+			self.yaw_cost += self.yaw_control_cost * duration / 3600
+		if abs(true_rel_wind_heading) > self.yaw_cut_off:
+			self.time_above_cut_off += duration
+
+		# Welford's update weighted by the duration
+		delta = power_output - self.__power_mean
+		if self.time > 0:
+			self.__power_mean += delta * duration / self.time
+		self.__power_m2 += duration * delta * (power_output - self.__power_mean)
+
+		self.histogram[self.__bin(true_rel_wind_heading), self.__bin(rel_wind_heading)] += duration
+
+	def add_span(self, power_output:np.ndarray, action, rel_wind_heading:np.ndarray, true_rel_wind_heading:np.ndarray, \
+		duration):
+		'''
+		Adds successive steps at once, e.g. the idle spans of a fast-forward. The sums are the same as with add, the mean
+		and variance of the power are merged with Chan's formula and are the same up to rounding
+		Inputs :
+			Arrays of size n_steps with the inputs of add, action and duration may be scalars
+		'''
+		power_output = np.asarray(power_output, dtype=float)
+		n_steps = len(power_output)
+		if n_steps == 0:
+			return
+		duration = np.broadcast_to(np.asarray(duration, dtype=float), (n_steps,))
+		actions = np.broadcast_to(action, (n_steps,)) != 1
+		span_time = np.sum(duration)
+
+		# Cumulative sums add the steps one after the other, as add does
+		self.n_steps += n_steps
+		time = self.time
+		self.time = np.cumsum(np.concatenate(([self.time], duration)))[-1]
+		self.energy = np.cumsum(np.concatenate(([self.energy], power_output * duration / 3600)))[-1]
+		if np.any(actions):
+			self.yaw_actions += int(np.count_nonzero(actions))
+			self.yaw_cost = np.cumsum(np.concatenate(([self.yaw_cost], self.yaw_control_cost * duration[actions] / 3600)))[-1]
+		above = np.abs(true_rel_wind_heading) > self.yaw_cut_off
+		if np.any(above):
+			self.time_above_cut_off = np.cumsum(np.concatenate(([self.time_above_cut_off], duration[above])))[-1]
+
+		np.add.at(self.histogram, (self.__bins(true_rel_wind_heading), self.__bins(rel_wind_heading)), duration)
+
+		if span_time <= 0:
+			return
+		span_mean = np.sum(power_output * duration) / span_time
+		span_m2 = np.sum(duration * (power_output - span_mean)**2)
+		delta = span_mean - self.__power_mean
+		self.__power_mean += delta * span_time / self.time
+		self.__power_m2 += span_m2 + delta * delta * time * span_time / self.time
+
+	def __bin(self, angle:float) -> int:
+		return min(max(int((angle + self.histogram_limit) // self.histogram_resolution), 0), self.n_bins - 1)
+
+	def __bins(self, angles:np.ndarray) -> np.ndarray:
+		return np.clip(((np.asarray(angles) + self.histogram_limit) // self.histogram_resolution).astype(int), 0, \
+			self.n_bins - 1)
+
+	@property
+	def histogram_edges(self) -> np.ndarray:
+		''' [deg] The edges of the bins on both axes of the histogram '''
+		return -self.histogram_limit + self.histogram_resolution * np.arange(self.n_bins + 1)
+
+	@property
+	def power_mean(self) -> float:
+		''' [MW] The time-weighted mean of the power output '''
+		return self.__power_mean
+
+	@property
+	def power_variance(self) -> float:
+		''' [MW^2] The time-weighted variance of the power output '''
+		return self.__power_m2 / self.time if self.time > 0 else 0.0
+
+	@property
+	def cut_off_fraction(self) -> float:
+		''' [] The fraction of the time where the true misalignment is above the yaw cut-off '''
+		return self.time_above_cut_off / self.time if self.time > 0 else 0.0
+
+	def summary(self) -> dict:
+		'''
+		The scalar statistics as plain python numbers
+		'''
+		return {'steps': int(self.n_steps), 'time': float(self.time), 'energy': float(self.energy), \
+				'yaw_actions': int(self.yaw_actions), 'yaw_cost': float(self.yaw_cost), \
+				'cut_off_fraction': float(self.cut_off_fraction), 'power_mean': float(self.power_mean), \
+				'power_std': float(np.sqrt(self.power_variance))}
+
+	def snapshot(self) -> tuple:
+		return (self.n_steps, self.time, self.energy, self.yaw_actions, self.yaw_cost, self.time_above_cut_off, \
+			self.__power_mean, self.__power_m2, self.histogram.copy())
+
+	def restore(self, state:tuple):
+		self.n_steps, self.time, self.energy, self.yaw_actions, self.yaw_cost, self.time_above_cut_off, \
+			self.__power_mean, self.__power_m2, histogram = state
+		self.histogram = histogram.copy()
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
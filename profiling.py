@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Timing instrumentation of the simulation steps """
+# ---------------------------------------------------------------------------
+import time
+
+
+class Step_profiler:
+	'''
+	Accumulates the wall time and the call count of each phase of Simu.step :
+		log 		- computing the relative wind and logging it with the power and the action
+		policy 		- calling the agent policy
+		turbine 	- stepping the wind turbine
+		wind 		- stepping the wind
+	A profiler can be given to several simulations, e.g. a batch of runs, to accumulate all of them.
+	'''
+	phases = ('log', 'policy', 'turbine', 'wind')
+	clock = staticmethod(time.perf_counter)
+
+	def __init__(self, report_every=None, report=print):
+		'''
+		Inputs :
+			report_every 	- [] If given, a report is emitted every report_every steps
+			report 			- The function called with the report text, print by default
+		'''
+		self.report_every = report_every
+		self.__report = report
+		self.reset()
+
+	def reset(self):
+		self.time = dict.fromkeys(self.phases, 0.0) 		# s
+		self.calls = dict.fromkeys(self.phases, 0)
+		self.n_steps = 0
+
+	def add_step(self, **phase_times):
+		'''
+		Adds the wall time in s of the phases of one step
+		'''
+		for phase, duration in phase_times.items():
+			self.time[phase] += duration
+			self.calls[phase] += 1
+		self.n_steps += 1
+		if self.report_every is not None and self.n_steps % self.report_every == 0:
+			self.__report(self.report())
+
+	def summary(self) -> dict:
+		'''
+		Outputs :
+			summary 	- For each phase the total time [s], the call count, the mean time per call [us] and the
+						  share of the total time. 'agent_share' is the share of the policy, a run is agent-bound
+						  when it is above 0.5 and environment-bound otherwise
+		'''
+		total = sum(self.time.values())
+		summary = {phase: {'time_s': self.time[phase],
+						   'calls': self.calls[phase],
+						   'mean_us': self.time[phase] / self.calls[phase] * 1e6 if self.calls[phase] > 0 else 0.0,
+						   'share': self.time[phase] / total if total > 0 else 0.0} for phase in self.phases}
+		summary['agent_share'] = summary['policy']['share']
+		return summary
+
+	def report(self) -> str:
+		summary = self.summary()
+		lines = ['%d steps, %s-bound' % (self.n_steps, 'agent' if summary['agent_share'] > 0.5 else 'environment')]
+		for phase in self.phases:
+			lines.append('  %-8s %10.3f s %10d calls %10.1f us/call %6.1f %%' % (phase, summary[phase]['time_s'], \
+				summary[phase]['calls'], summary[phase]['mean_us'], 100 * summary[phase]['share']))
+		return '\n'.join(lines)
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
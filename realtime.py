@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Real-time controllers driven by asynchronous streams of wind measurements
+
+Usage :
+	runner = Realtime_runner([Basic_agent()], [Wind_turbine(270, True)], Replay_source(Recorded_wind('mast.npy'), rate=10))
+	stats = runner.run()
+"""
+# ---------------------------------------------------------------------------
+import array
+import asyncio
+import time
+import numpy as np
+from collections import namedtuple
+from math_utils import wrap_to_m180_p180
+
+# A wind measurement, the time is the one of the measurement in s
+Wind_sample = namedtuple('Wind_sample', ['time', 'speed', 'heading'])
+
+
+class Replay_source:
+	'''
+	Local stand-in of a live measurement stream : replays the steps of a wind, e.g. a Recorded_wind of a file or a Wind,
+	as an asynchronous iterator of Wind_sample. The samples are paced at rate times real time, or sent as fast as the
+	consumers take them if rate is None
+	'''
+	def __init__(self, wind, n_steps:int=None, rate:float=None):
+		'''
+		Inputs :
+			wind 		- The wind to replay, with step(), speed, heading and step_duration
+			n_steps 	- [] The number of samples, until the wind is exhausted by default
+			rate 		- [] The replay speed relative to real time, e.g. 1 for real time or 10 for 10 times faster
+		'''
+		self.wind = wind
+		self.n_steps = n_steps
+		self.rate = rate
+
+	async def __aiter__(self):
+		loop = asyncio.get_running_loop()
+		start = loop.time()
+		sample_time = 0.0
+		step = 0
+		while self.n_steps is None or step < self.n_steps:
+			if self.rate is not None:
+				# Absolute deadlines, so that the pace does not drift with the time spent by the consumers
+				await asyncio.sleep(max(start + sample_time / self.rate - loop.time(), 0))
+			else:
+				await asyncio.sleep(0)
+			yield Wind_sample(sample_time, float(self.wind.speed), float(self.wind.heading))
+			try:
+				self.wind.step()
+			except EOFError:
+				return
+			sample_time += self.wind.step_duration
+			step += 1
+
+
+class Socket_source:
+	'''
+	Live measurement stream read from a TCP socket, one "time,speed,heading" line per measurement in s, m/s and deg.
+	The stream ends when the connection is closed
+	'''
+	def __init__(self, host:str, port:int):
+		self.host = host
+		self.port = port
+
+	async def __aiter__(self):
+		reader, writer = await asyncio.open_connection(self.host, self.port)
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					return
+				if line.strip():
+					yield Wind_sample(*(float(value) for value in line.split(b',')[:3]))
+		finally:
+			writer.close()
+
+
+class Realtime_runner:
+	'''
+	Runs the agents of many wind turbines concurrently in one event loop. Each wind turbine has a task that takes the
+	measurements of its source from a bounded queue, calls its agent, emits the yaw command and scores the power with
+	its Wind_turbine model, as Simu.step does.
+
+	Backpressure : when the queue of a wind turbine is full, the source waits for the controller, which slows down a
+	replay or a socket (TCP flow control). With drop_oldest the oldest measurement is dropped instead, so the
+	controllers always work on fresh data and the drops are counted.
+
+	Latency : the decision latency of a step is the time from the arrival of the measurement to the emission of the
+	command, queueing included, and the compute latency is the time of the agent policy and of the command.
+	'''
+	def __init__(self, agents, wind_turbines, sources, queue_size:int=16, drop_oldest:bool=False, on_command=None):
+		'''
+		Inputs :
+			agents 			- The agent of each wind turbine, a list of size N
+			wind_turbines 	- The Wind_turbine models that score the power, a list of size N
+			sources 		- An asynchronous iterator of Wind_sample shared by all the wind turbines, e.g. Replay_source or
+							  Socket_source, or a list of N of them
+			queue_size 		- [] The number of measurements that can wait for a wind turbine controller
+			drop_oldest 	- [bool] Whether the oldest measurement is dropped when a queue is full, instead of waiting
+			on_command 		- If given, called with (turbine index, measurement time, action) for each command, it may be
+							  a coroutine function, e.g. to send the commands on a socket
+		'''
+		self.agents = list(agents)
+		self.wind_turbines = list(wind_turbines)
+		self.n_turbines = len(self.wind_turbines)
+		self.sources = list(sources) if isinstance(sources, (list, tuple)) else [sources]
+		self.queue_size = queue_size
+		self.drop_oldest = drop_oldest
+		self.on_command = on_command
+
+	def run(self) -> list:
+		'''
+		Runs until every source is exhausted, see run_async
+		'''
+		return asyncio.run(self.run_async())
+
+	async def run_async(self) -> list:
+		'''
+		Outputs :
+			stats 	- A list with a dict of statistics per wind turbine : 'steps', 'energy' [MWh], 'yaw_actions',
+					  'dropped' samples, 'max_queue' depth and the percentiles of the decision and compute latencies [us]
+		'''
+		queues = [asyncio.Queue(self.queue_size) for _ in range(self.n_turbines)]
+		self.__dropped = [0] * self.n_turbines
+		# A shared source feeds every queue, otherwise each wind turbine has its own source
+		if len(self.sources) == 1:
+			producers = [self.__produce(self.sources[0], queues, range(self.n_turbines))]
+		else:
+			producers = [self.__produce(source, [queues[i]], [i]) for i, source in enumerate(self.sources)]
+		controllers = [self.__control(i, queue) for i, queue in enumerate(queues)]
+		results = await asyncio.gather(*producers, *controllers)
+		return list(results[len(producers):])
+
+	async def __produce(self, source, queues, turbines):
+		try:
+			async for sample in source:
+				arrival = time.perf_counter()
+				for queue, i in zip(queues, turbines):
+					if self.drop_oldest and queue.full():
+						queue.get_nowait()
+						self.__dropped[i] += 1
+					await queue.put((sample, arrival))
+		finally:
+			# The end of the stream
+			for queue in queues:
+				await queue.put(None)
+
+	async def __control(self, i:int, queue:asyncio.Queue) -> dict:
+		agent, wind_turbine = self.agents[i], self.wind_turbines[i]
+		decision_latency = array.array('d')
+		compute_latency = array.array('d')
+		energy = 0.0
+		yaw_actions = 0
+		max_queue = 0
+		last_time, last_power, last_duration = None, 0.0, 0.0
+		while True:
+			max_queue = max(max_queue, queue.qsize())
+			item = await queue.get()
+			if item is None:
+				break
+			sample, arrival = item
+			start = time.perf_counter()
+			rel_wind_heading = wrap_to_m180_p180(sample.heading - wind_turbine.heading)
+			action = agent.policy(rel_wind_heading)
+			if self.on_command is not None:
+				command = self.on_command(i, sample.time, action)
+				if asyncio.iscoroutine(command):
+					await command
+			end = time.perf_counter()
+			decision_latency.append(end - arrival)
+			compute_latency.append(end - start)
+
+			# The power of a measurement lasts until the next measurement
+			if last_time is not None:
+				last_duration = sample.time - last_time
+				energy += last_power * last_duration / 3600
+			last_power = wind_turbine.step(sample.speed, sample.heading, action)
+			last_time = sample.time
+			yaw_actions += action != 1
+		energy += last_power * last_duration / 3600
+
+		stats = {'steps': len(decision_latency), 'energy': float(energy), 'yaw_actions': int(yaw_actions),
+				 'dropped': self.__dropped[i], 'max_queue': max_queue}
+		for name, latencies in (('decision', decision_latency), ('compute', compute_latency)):
+			latencies = np.frombuffer(latencies) * 1e6 if len(latencies) > 0 else np.zeros(1)
+			for q in (50, 99):
+				stats[name + '_latency_p' + str(q) + '_us'] = float(np.percentile(latencies, q))
+			stats[name + '_latency_max_us'] = float(np.max(latencies))
+		return stats
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
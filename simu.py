@@ -6,16 +6,25 @@
 # ---------------------------------------------------------------------------
 """ Setup a simulation of a wind turbine agent """
 # ---------------------------------------------------------------------------
+import copy
 import numpy as np
-from math_utils import wrap_to_m180_p180
+from collections import namedtuple
+from math_utils import wrap_to_m180_p180, make_rng, Prefetched_draws, get_rng_state, set_rng_state, copy_rng
 from wind_turbine import Wind_turbine, Wind
 
+# Compact state of a simulation, the agent state is None for agents without snapshot and the step duration is the one
+# of the step controller
+Simu_state = namedtuple('Simu_state', ['step_count', 'time', 'energy', 'step_duration', 'wind', 'wind_turbine', 'agent', 'stats'])
+
 
 class Basic_agent:
 	__threshold = 5 					# deg, corresponds to the wind deadzone in which no action is taken
 
-	def __init__(self):
-		pass
+	def __init__(self, threshold=None):
+		'''
+		Input : the threshold of the deadzone in deg, 5deg by default
+		'''
+		self.__threshold = self.__threshold if threshold is None else threshold
 
 	def policy(self, rel_wind_heading) -> int:
 		'''
@@ -25,26 +34,149 @@ class Basic_agent:
 		'''
 		rel_wind_heading = wrap_to_m180_p180(rel_wind_heading)
 		# If the relative angle to the wind is low do nothing
-		if np.abs(rel_wind_heading) - self.__threshold < 0:
+		if abs(rel_wind_heading) - self.__threshold < 0:
 			return 1
 		# Else follow the wind
 		else:
-			return np.sign(rel_wind_heading) + 1
+			return 1 if rel_wind_heading == 0 else (2 if rel_wind_heading > 0 else 0)
+
+	def idle_batch(self, rel_wind_headings) -> np.ndarray:
+		'''
+		Deadband of the policy, used by Simu to fast-forward the steps where the agent does nothing
+		Input  : an array of relative wind headings between the wind and the wind turbine.
+		Ouptut : an array of bool, True where policy() returns 1 'do nothing'
+		'''
+		return np.abs(wrap_to_m180_p180(np.asarray(rel_wind_headings))) - self.__threshold < 0
+
+	def policy_batch(self, rel_wind_headings) -> np.ndarray:
+		'''
+		Same policy as policy() with array operations
+		Input  : an array of relative wind headings between the wind and the wind turbines.
+		Ouptut : an array of int with the selected actions
+		'''
+		rel_wind_headings = wrap_to_m180_p180(np.asarray(rel_wind_headings))
+		return np.where(np.abs(rel_wind_headings) - self.__threshold < 0, 1, np.sign(rel_wind_headings) + 1).astype(int)
 
 	def __str__(self):
 		return str(self.__class__) + ": " + str(self.__dict__)
 
 
 class Random_agent:
-	def __init__(self):
-		pass
+	def __init__(self, rng=None):
+		'''
+		Input : the random generator of the agent, a numpy Generator or RandomState, or the seed of a new Generator. By default
+				the global numpy random state is used. The actions are drawn by blocks
+		'''
+		self.__actions = Prefetched_draws(make_rng(rng), 'choice', [0, 1, 2])
 
 	def policy(self, rel_wind_heading) -> int:
 		'''
 		Define the policy of the agent, as a random agent it selects a random action given a uniform probability distribution
 		Ouptut : an int corresponding to the selected action : 0 rotate clockwise, 1 do nothgin, 2 rotate trigo
 		'''
-		return np.random.choice([0, 1, 2])
+		return int(self.__actions.take(1)[0])
+
+	def policy_batch(self, rel_wind_headings) -> np.ndarray:
+		'''
+		Same policy as policy() for an array of relative wind headings, the actions are drawn at once
+		Ouptut : an array of int with the selected actions
+		'''
+		shape = np.shape(rel_wind_headings)
+		return self.__actions.take(int(np.prod(shape))).reshape(shape).copy()
+
+	def snapshot(self):
+		return self.__actions.get_state()
+
+	def restore(self, state):
+		self.__actions.set_state(state)
+
+	def copy(self):
+		agent = copy.copy(self)
+		agent.__actions = self.__actions.copy()
+		return agent
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
+
+
+class Mpc_agent:
+	'''
+	Model predictive yaw control : at each step, candidate action sequences over a horizon are scored against an
+	ensemble of forecasts of the wind sampled from its OU dynamics with Wind.forecast, and the first action of the
+	sequence with the highest expected energy is applied. The power of every (candidate, member, step) is read from
+	the power table of the wind turbine model in one array evaluation, minus the yaw control cost of the actions.
+	The inertia of the power is not modelled, it delays the power but hardly changes its sum over the horizon.
+
+	The agent reads the wind and the wind turbine given to attach, which Simu calls with its own wind and wind turbine.
+	The wind must be a synthetic Wind, a Recorded_wind has no dynamics to forecast.
+	'''
+	def __init__(self, horizon:int=20, n_ensemble:int=32, candidates=None, rng=None):
+		'''
+		Inputs :
+			horizon 	- [] The number of steps of the action sequences
+			n_ensemble 	- [] The number of wind forecasts of the ensemble
+			candidates 	- {0, 1, 2} The action sequences, an array of size n_candidates x horizon. By default, the
+						  sequences that rotate in one direction during the first m steps and then do nothing
+			rng 		- The random generator of the forecasts, see make_rng
+		'''
+		self.horizon = horizon
+		self.n_ensemble = n_ensemble
+		if candidates is None:
+			candidates = [np.ones(horizon, dtype=int)]
+			for action in (0, 2):
+				for m in range(1, horizon + 1):
+					candidates.append(np.where(np.arange(horizon) < m, action, 1))
+		self.candidates = np.array(candidates)
+		self.__rng = make_rng(rng)
+		self.__wind = None
+
+	def attach(self, wind, wind_turbine):
+		'''
+		Sets the wind that is forecast and the wind turbine whose power model, yaw step and yaw cost are used
+		'''
+		if not hasattr(wind, 'forecast'):
+			raise TypeError('Mpc_agent needs a synthetic Wind with forecast, not a ' + type(wind).__name__)
+		self.__wind = wind
+		self.__power_table = wind_turbine.spec.power_table()
+		# Rotation of the wind turbine after each step of each candidate and cost of the actions
+		self.__offsets = np.cumsum((self.candidates - 1) * wind_turbine.yaw_control_step, axis=1)
+		self.__action_cost = wind_turbine.yaw_control_cost * np.count_nonzero(self.candidates != 1, axis=1)
+
+	def scores(self, rel_wind_heading:float) -> np.ndarray:
+		'''
+		Input  : the estimated relative wind heading between the wind and the wind turbine
+		Output : [MW] the expected sum of the power outputs over the horizon of each candidate, an array of size n_candidates
+		'''
+		n_ensemble = self.n_ensemble
+		# The first step is scored with the current wind, as in Simu.step, the next ones with the forecasts
+		speed = np.full((n_ensemble, 1), float(self.__wind.speed))
+		heading_change = np.zeros((n_ensemble, 1))
+		if self.horizon > 1:
+			forecast_speed, forecast_heading = self.__wind.forecast(self.horizon - 1, n_ensemble, self.__rng)
+			speed = np.concatenate((speed, forecast_speed), axis=1)
+			heading_change = np.concatenate((heading_change, forecast_heading - self.__wind.heading), axis=1)
+		# Relative wind heading of size n_candidates x n_ensemble x horizon
+		rel_wind_headings = wrap_to_m180_p180(rel_wind_heading + heading_change[None, :, :] - self.__offsets[:, None, :])
+		power_output = self.__power_table.power(speed, rel_wind_headings)
+		return np.sum(np.mean(power_output, axis=1), axis=1) - self.__action_cost
+
+	def policy(self, rel_wind_heading) -> int:
+		'''
+		Input  : the estimated relative wind heading between the wind and the wind turbine
+		Ouptut : the first action of the best candidate : 0 rotate trigo, 1 do nothing, 2 rotate clockwise
+		'''
+		return int(self.candidates[np.argmax(self.scores(rel_wind_heading)), 0])
+
+	def snapshot(self):
+		return get_rng_state(self.__rng)
+
+	def restore(self, state):
+		set_rng_state(self.__rng, state)
+
+	def copy(self):
+		agent = copy.copy(self)
+		agent.__rng = copy_rng(self.__rng)
+		return agent
 
 	def __str__(self):
 		return str(self.__class__) + ": " + str(self.__dict__)
@@ -58,51 +190,397 @@ class Custom_agent:
 	def policy(self, rel_wind_heading) -> int:
 		pass
 
+	def policy_batch(self, rel_wind_headings) -> np.ndarray:
+		'''
+		Policy for an array of relative wind headings, used with batches of environments such as Vec_env.
+		This fallback calls policy() on each relative wind heading, it should be replaced by array operations
+		to keep the python loop out of the batched steps
+		Ouptut : an array with the selected actions
+		'''
+		return np.array([self.policy(h) for h in np.ravel(rel_wind_headings)]).reshape(np.shape(rel_wind_headings))
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
+
+
+class Step_controller:
+	'''
+	Adaptive time stepping : chooses the duration of the next step of a simulation. The step is halved, down to
+	min_duration, when the wind deviates from its diurnal target (a gust or a heading shift) or when the wind turbine is
+	misaligned with the wind, and it is doubled, up to max_duration, when all of them are below half their tolerance.
+	So calm periods are run with coarse steps and gusts with fine ones.
+	'''
+	def __init__(self, min_duration=1, max_duration=64, speed_tolerance=2.5, heading_tolerance=6, yaw_tolerance=5):
+		'''
+		Inputs :
+			min_duration 		- [s] The shortest step
+			max_duration 		- [s] The longest step, the durations are min_duration times powers of 2
+			speed_tolerance 	- [m/s] The deviation of the wind speed from its diurnal target
+			heading_tolerance 	- [deg] The deviation of the wind heading from its diurnal target
+			yaw_tolerance 		- [deg] The estimated relative wind heading of the wind turbine
+		'''
+		self.min_duration = min_duration
+		self.max_duration = max_duration
+		self.speed_tolerance = speed_tolerance
+		self.heading_tolerance = heading_tolerance
+		self.yaw_tolerance = yaw_tolerance
+		self.duration = min_duration
+
+	def next_duration(self, wind, rel_wind_heading:float) -> float:
+		'''
+		Inputs :
+			wind 				- The wind of the simulation, its deviations are only used if it has speed_deviation and
+								  heading_deviation, e.g. Wind
+			rel_wind_heading 	- [deg] The estimated relative wind heading of the current step
+		Outputs :
+			duration 			- [s] The duration of the next step
+		'''
+		error = abs(rel_wind_heading) / self.yaw_tolerance
+		if hasattr(wind, 'speed_deviation'):
+			error = max(error, abs(wind.speed_deviation) / self.speed_tolerance, abs(wind.heading_deviation) / self.heading_tolerance)
+		if error > 1:
+			self.duration = max(self.duration / 2, self.min_duration)
+		elif error < 0.5:
+			self.duration = min(self.duration * 2, self.max_duration)
+		return self.duration
+
 	def __str__(self):
 		return str(self.__class__) + ": " + str(self.__dict__)
 
 
 class Simu:
-	power_output_log = [] 			# MW
-	action_log = []
-	rel_wind_heading_log = []		# deg
-	true_rel_wind_heading_log = [] 	# deg
-	wd_heading_log = [] 			# deg
-	step_count = 0
-
-	def __init__(self, agent=None, wind_model=None, wind_turbine_model=None, max_steps=None):
+	# Channels that can be logged with their types, float32 and int8 columns are 5 to 10 times smaller than python lists
+	log_types = {'power_output': np.float32, 		# MW
+				 'action': np.int8,
+				 'rel_wind_heading': np.float32,		# deg
+				 'true_rel_wind_heading': np.float32, 	# deg
+				 'wd_heading': np.float32, 			# deg
+				 'time': np.float64} 					# s, time at the beginning of the step
+	__min_span = 16 					# steps, shortest wind span generated at once by the fast-forward
+	__max_span = 4096 					# steps, longest wind span generated at once by the fast-forward
+	__min_idle_span = 16 				# steps, shorter idle spans do not pay for the look-ahead of the fast-forward
+	__max_short_spans = 3 				# consecutive short idle spans after which the steps are run one by one
+	__min_backoff = 64 					# steps, first run of steps one by one, it doubles up to __max_span while the
+										# idle spans stay short
+
+	def __init__(self, agent=None, wind_model=None, wind_turbine_model=None, max_steps=None, log_channels=None, log_every=None, \
+		profiler=None, step_controller=None, max_time=None, stats=None):
+		'''
+		Inputs :
+			agent 				- The agent that gives the policy, a Basic_agent by default
+			wind_model 			- The wind, a Wind instance by default
+			wind_turbine_model 	- The wind turbine, a Wind_turbine instance by default
+			max_steps 			- [] The maximum number of steps of the simulation, 24h at 1s by default. With max_time,
+								  it is by default the number of steps of max_time at the shortest step. It may be
+								  np.inf when nothing is logged, the simulation then runs until a stop condition
+			log_channels 		- [] The names of the logged channels among log_types, all of them by default
+			log_every 			- [] Only one step every log_every steps is logged, 1 by default
+			profiler 			- [Step_profiler] If given, the wall time of each phase of the steps is accumulated in
+								  the profiler. It can be shared by several simulations
+			step_controller 	- [Step_controller] If given, the duration of each step is chosen by the controller
+								  instead of being the step duration of the wind
+			max_time 			- [s] If given, the simulation also stops when this time is reached, the last step is
+								  shortened to end on it
+			stats 				- [Online_stats] If given, every step is added to these constant memory statistics, e.g.
+								  for runs too long to be logged
+		'''
 		self.wd = Wind(10, 0, 1, 'OU') if wind_model is None else wind_model
 		self.wt = Wind_turbine(0, False) if wind_turbine_model is None else wind_turbine_model
 		self.agent = Basic_agent() if agent is None else agent
-		self.max_steps = 24*3600 if max_steps is None else max_steps 
-		self.power_output_log = self.max_steps * [0]
-		self.action_log = self.max_steps * [1]
-		self.rel_wind_heading_log = self.max_steps * [0]
-		self.true_rel_wind_heading_log = self.max_steps * [0]
-		self.wd_heading_log = self.max_steps * [0]
+		# Agents that model the wind or the wind turbine, e.g. Mpc_agent, are given the ones of the simulation
+		if hasattr(self.agent, 'attach'):
+			self.agent.attach(self.wd, self.wt)
+		self.step_controller = step_controller
+		self.max_time = max_time
+		if max_steps is None and max_time is not None:
+			min_duration = self.wd.step_duration if step_controller is None else step_controller.min_duration
+			max_steps = int(np.ceil(max_time / min_duration))
+		self.max_steps = 24*3600 if max_steps is None else max_steps
+		self.step_count = 0
+		self.time = 0.0 				# s
+		self.energy = 0.0 				# MWh, the power output integrated over the duration of the steps
+		self.log_every = 1 if log_every is None else log_every
+		self.stats = stats
+		if stats is not None:
+			stats.attach(self.wt)
+		self.__allocate_logs(self.log_types.keys() if log_channels is None else log_channels)
 
-	def step(self):
-		# Log the estimated wind
-		self.rel_wind_heading_log[self.step_count] = wrap_to_m180_p180(self.wd.heading - self.wt.heading)
+		# The profiled step is only used when a profiler is given, so there is no overhead otherwise
+		self.profiler = profiler
+		if profiler is not None:
+			self.step = self.__profiled_step
+
+	def __allocate_logs(self, log_channels):
+		'''
+		Preallocated columns, a column is None when its channel is not logged
+		'''
+		log_channels = list(log_channels)
+		if len(log_channels) > 0 and not np.isfinite(self.max_steps):
+			raise ValueError('The logs need a finite max_steps, use log_channels=() and stats for open-ended runs')
+		n_logs = -(-self.max_steps // self.log_every) if len(log_channels) > 0 else 0
+		logs = {name: np.zeros(n_logs, dtype=self.log_types[name]) for name in log_channels}
+		if 'action' in logs:
+			logs['action'][:] = 1
+		self.__set_logs(logs)
+
+	def __set_logs(self, logs):
+		self.logs = logs
+		self.power_output_log = self.logs.get('power_output')
+		self.action_log = self.logs.get('action')
+		self.rel_wind_heading_log = self.logs.get('rel_wind_heading')
+		self.true_rel_wind_heading_log = self.logs.get('true_rel_wind_heading')
+		self.wd_heading_log = self.logs.get('wd_heading')
+		self.time_log = self.logs.get('time')
 
-		# Log the true wind
-		self.true_rel_wind_heading_log[self.step_count] = wrap_to_m180_p180(self.wd.heading - self.wt.true_heading)
-		self.wd_heading_log[self.step_count] = self.wd.heading
+	def step(self):
+		# Estimated wind, the true wind is logged before the wind turbine moves
+		wd_heading, rel_wind_heading, true_rel_wind_heading, log_row = self.__observe()
 
 		# Get action
-		self.action_log[self.step_count] = self.agent.policy(self.rel_wind_heading_log[self.step_count])
+		action = self.agent.policy(rel_wind_heading)
 
 		# Apply action and get power output
-		self.power_output_log[self.step_count] = self.wt.step(self.wd.speed, self.wd.heading, self.action_log[self.step_count])
+		power_output = self.wt.step(self.wd.speed, wd_heading, action)
+
+		if log_row is not None:
+			self.__log(log_row, power_output=power_output, action=action, \
+				rel_wind_heading=rel_wind_heading, wd_heading=wd_heading, time=self.time)
+
+		# Generate new wind, the power output is integrated over the duration of the step
+		duration = self.__step_wind(rel_wind_heading)
+		self.energy += power_output * duration / 3600
+		self.time += duration
+		if self.stats is not None:
+			self.stats.add(power_output, action, rel_wind_heading, true_rel_wind_heading, duration)
 
-		# Generate new wind
-		self.wd.step()
+	def __profiled_step(self):
+		'''
+		Same as step with the wall time of each phase given to the profiler
+		'''
+		clock = self.profiler.clock
+		t0 = clock()
+		wd_heading, rel_wind_heading, true_rel_wind_heading, log_row = self.__observe()
+		t1 = clock()
+		action = self.agent.policy(rel_wind_heading)
+		t2 = clock()
+		power_output = self.wt.step(self.wd.speed, wd_heading, action)
+		t3 = clock()
+		if log_row is not None:
+			self.__log(log_row, power_output=power_output, action=action, \
+				rel_wind_heading=rel_wind_heading, wd_heading=wd_heading, time=self.time)
+		t4 = clock()
+		duration = self.__step_wind(rel_wind_heading)
+		self.energy += power_output * duration / 3600
+		self.time += duration
+		if self.stats is not None:
+			self.stats.add(power_output, action, rel_wind_heading, true_rel_wind_heading, duration)
+		t5 = clock()
+		self.profiler.add_step(log=(t1 - t0) + (t4 - t3), policy=t2 - t1, turbine=t3 - t2, wind=t5 - t4)
 
-	def run_simu(self):
-		while self.step_count < self.max_steps:
-			self.step()
-			self.step_count += 1
+	def __step_wind(self, rel_wind_heading:float) -> float:
+		'''
+		Moves the wind to the next step and returns the duration of the step
+		'''
+		if self.step_controller is None and self.max_time is None:
+			self.wd.step()
+			return self.wd.step_duration
+		duration = self.wd.step_duration if self.step_controller is None \
+			else self.step_controller.next_duration(self.wd, rel_wind_heading)
+		if self.max_time is not None:
+			duration = min(duration, self.max_time - self.time)
+		self.wd.step(duration)
+		return duration
+
+	def __observe(self):
+		'''
+		Returns the wind heading, the estimated and true relative wind headings and the log row of the current step.
+		The true relative wind heading is only computed when it is logged or given to the statistics, and the log row
+		is None if the step is not logged
+		'''
+		wd_heading = self.wd.heading
+		rel_wind_heading = wrap_to_m180_p180(wd_heading - self.wt.heading)
+		log_row = self.step_count // self.log_every if self.step_count % self.log_every == 0 else None
+		true_rel_wind_heading = None
+		log_true_rel = log_row is not None and 'true_rel_wind_heading' in self.logs
+		if log_true_rel or self.stats is not None:
+			true_rel_wind_heading = wrap_to_m180_p180(wd_heading - self.wt.true_heading)
+			if log_true_rel:
+				self.logs['true_rel_wind_heading'][log_row] = true_rel_wind_heading
+		return wd_heading, rel_wind_heading, true_rel_wind_heading, log_row
+
+	def __log(self, row, **values):
+		for name, value in values.items():
+			if name in self.logs:
+				self.logs[name][row] = value
+
+	def snapshot(self) -> Simu_state:
+		'''
+		Returns the state of the simulation : step count, time, energy, wind, wind turbine and agent states, random
+		generators included, and the statistics
+		'''
+		agent_state = self.agent.snapshot() if hasattr(self.agent, 'snapshot') else None
+		step_duration = None if self.step_controller is None else self.step_controller.duration
+		stats_state = None if self.stats is None else self.stats.snapshot()
+		return Simu_state(self.step_count, self.time, self.energy, step_duration, self.wd.snapshot(), self.wt.snapshot(), \
+			agent_state, stats_state)
+
+	def restore(self, state:Simu_state):
+		'''
+		Puts the simulation back in the state of a snapshot. The logs of the steps after the snapshot are
+		overwritten when they are run again
+		'''
+		self.step_count = state.step_count
+		self.time = state.time
+		self.energy = state.energy
+		if state.step_duration is not None:
+			self.step_controller.duration = state.step_duration
+		self.wd.restore(state.wind)
+		self.wt.restore(state.wind_turbine)
+		if state.agent is not None:
+			self.agent.restore(state.agent)
+		if state.stats is not None:
+			self.stats.restore(state.stats)
+
+	def clone(self, n_branches:int=1, state:Simu_state=None, log_channels=()) -> list:
+		'''
+		Forks the simulation into independent branches, e.g. to try several action sequences from the same state
+		Inputs :
+			n_branches 		- [] The number of branches
+			state 			- [Simu_state] The state of the branches, the current state by default
+			log_channels 	- [] The channels logged by the branches, none by default so that forking is cheap
+		Outputs :
+			branches 		- A list of Simu instances with their own wind, wind turbine, agent and statistics
+		'''
+		branches = []
+		for _ in range(n_branches):
+			branch = Simu.__new__(Simu)
+			branch.__dict__.update(self.__dict__)
+			branch.__dict__.pop('step', None)
+			branch.wd = self.wd.copy()
+			branch.wt = self.wt.copy()
+			branch.agent = self.agent.copy() if hasattr(self.agent, 'copy') else copy.copy(self.agent)
+			if hasattr(branch.agent, 'attach'):
+				branch.agent.attach(branch.wd, branch.wt)
+			branch.step_controller = copy.copy(self.step_controller)
+			branch.stats = copy.deepcopy(self.stats)
+			branch.__allocate_logs(log_channels)
+			if branch.profiler is not None:
+				branch.step = branch.__profiled_step
+			if state is not None:
+				branch.restore(state)
+			branches.append(branch)
+		return branches
+
+	def run_simu(self, fast_forward:bool=False, stop=None, check_every:int=1):
+		'''
+		Runs the simulation until max_steps, max_time or the stop condition. The logs are then cut to the steps that were run
+		Inputs :
+			fast_forward 	- [bool] If the agent declares its deadband with idle_batch, the spans of steps where it does
+							  nothing are computed in one vectorized pass, and the steps where it acts are run one by one.
+							  When the idle spans stay short, the steps are run one by one for a while, so that the
+							  look-ahead does not slow the run down. The logs and the sums are the same as running every
+							  step, the mean and variance of the power of the stats are the same up to rounding. It needs a
+							  wind with generate and snapshot and a wind turbine with idle_steps, and it is not used with
+							  a profiler or a step controller
+			stop 			- If given, a function of the simulation that returns True when it must stop, e.g.
+							  lambda sm: sm.stats.energy > 1e3
+			check_every 	- [] The stop condition is checked every check_every steps. The fast-forward spans end on
+							  these checks, so that the run stops on the same step with and without fast-forward
+		'''
+		fast_forward = fast_forward and self.profiler is None and self.step_controller is None \
+			and hasattr(self.agent, 'idle_batch') and hasattr(self.wd, 'generate') and hasattr(self.wd, 'snapshot') \
+			and hasattr(self.wt, 'idle_steps')
+		self.__span = self.__min_span
+		self.__short_spans = 0
+		self.__backoff = self.__min_backoff
+		self.__stepping_until = self.step_count
+		while self.step_count < self.max_steps and (self.max_time is None or self.time < self.max_time):
+			end = self.max_steps if stop is None else min(self.max_steps, (self.step_count // check_every + 1) * check_every)
+			if fast_forward:
+				self.__run_fast_forward(end)
+			while self.step_count < end and (self.max_time is None or self.time < self.max_time):
+				self.step()
+				self.step_count += 1
+			if stop is not None and stop(self):
+				break
+		if self.step_count < self.max_steps:
+			n_logs = -(-self.step_count // self.log_every)
+			self.__set_logs({name: log[:n_logs] for name, log in self.logs.items()})
+
+	def __run_fast_forward(self, end):
+		'''
+		The wind does not depend on the actions, so the wind of the next steps is generated at once and the first step
+		where the agent acts is found from the deadband. The steps before it keep the wind turbine heading and are
+		computed in one pass, then the wind is put back in the state of that step, which is run normally.
+		After __max_short_spans consecutive idle spans shorter than __min_idle_span, the look-ahead costs more than it
+		saves, e.g. with a turbulent wind, and the next steps are run one by one, for longer each time it happens again.
+		It runs until the step end, or until the last whole step before max_time
+		'''
+		duration = self.wd.step_duration
+		while self.step_count < end:
+			n_steps = end - self.step_count
+			if self.max_time is not None:
+				# The steps that may be shortened by max_time are left to step, one step of margin for the rounding
+				n_steps = min(n_steps, int((self.max_time - self.time) // duration) - 1)
+				if n_steps <= 0:
+					return
+			wd_heading = self.wd.heading
+			if self.step_count < self.__stepping_until \
+				or not self.agent.idle_batch(wrap_to_m180_p180(wd_heading - self.wt.heading)):
+				self.step()
+				self.step_count += 1
+				continue
+
+			# Wind of the next steps, the current one included
+			n_steps = min(self.__span, n_steps)
+			wd_speed = self.wd.speed
+			wind_state = self.wd.snapshot()
+			speeds, headings = self.wd.generate(n_steps)
+			speeds = np.concatenate(([wd_speed], speeds[:-1]))
+			headings = np.concatenate(([wd_heading], headings[:-1]))
+			rel_wind_headings = wrap_to_m180_p180(headings - self.wt.heading)
+			active = np.nonzero(~self.agent.idle_batch(rel_wind_headings))[0]
+			n_idle = n_steps if len(active) == 0 else active[0]
+			if n_idle < n_steps:
+				# Wind back to the state of the first active step
+				self.wd.restore(wind_state)
+				if n_idle > 0:
+					self.wd.generate(n_idle)
+				self.__span = max(self.__min_span, n_idle)
+			else:
+				self.__span = min(2 * self.__span, self.__max_span)
+			if n_idle >= self.__min_idle_span:
+				self.__short_spans = 0
+				self.__backoff = self.__min_backoff
+			else:
+				self.__short_spans += 1
+				if self.__short_spans >= self.__max_short_spans:
+					self.__stepping_until = self.step_count + n_idle + self.__backoff
+					self.__backoff = min(2 * self.__backoff, self.__max_span)
+					self.__short_spans = 0
+
+			power_output = self.wt.idle_steps(speeds[:n_idle], headings[:n_idle])
+			true_rel_wind_headings = wrap_to_m180_p180(headings[:n_idle] - self.wt.true_heading)
+			# Cumulative sums add the steps one after the other, as step does
+			time = np.cumsum(np.concatenate(([self.time], np.full(n_idle, duration))))
+			self.__log_span(n_idle, power_output=power_output, action=1, rel_wind_heading=rel_wind_headings[:n_idle], \
+				wd_heading=headings[:n_idle], true_rel_wind_heading=true_rel_wind_headings, time=time[:-1])
+			if self.stats is not None:
+				self.stats.add_span(power_output, 1, rel_wind_headings[:n_idle], true_rel_wind_headings, duration)
+			self.energy = np.cumsum(np.concatenate(([self.energy], power_output * duration / 3600)))[-1]
+			self.time = time[-1]
+			self.step_count += n_idle
+
+	def __log_span(self, n_steps, **values):
+		'''
+		Logs the steps step_count to step_count + n_steps - 1
+		'''
+		steps = np.arange(self.step_count, self.step_count + n_steps)
+		logged = steps % self.log_every == 0
+		rows = steps[logged] // self.log_every
+		for name, value in values.items():
+			if name in self.logs:
+				self.logs[name][rows] = value[logged] if np.ndim(value) > 0 else value
 
 	def __str__(self):
 		return str(self.__class__) + ": " + str(self.__dict__)
-
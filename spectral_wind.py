@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Spectral turbulence models of the wind, generated by FFT
+
+Usage :
+	wd = Wind(10, 270, 1, model_type='Kaimal', rng=0)
+	wd = Wind(10, 270, 1, model_type='Kaimal', model_options={'turbulence_intensity': 0.16})
+"""
+# ---------------------------------------------------------------------------
+import numpy as np
+
+
+class Kaimal_turbulence:
+	'''
+	Longitudinal and lateral turbulence with the Kaimal spectra of IEC 61400-1 :
+		S_k(f) = 4 sigma_k² L_k/U / (1 + 6 f L_k/U)^(5/3), with L_u = 8.1 Lambda, L_v = 2.7 Lambda, sigma_v = 0.8 sigma_u
+	The series are synthesized by chunks of chunk_size samples, by filtering white noise in the frequency domain, which
+	costs O(N log N). Consecutive chunks are independent and overlap by overlap samples, where the end of a chunk is
+	cross-faded into the start of the next one with cos and sin weights, so that the variance is kept. Only the current
+	chunk is in memory, so arbitrarily long series are streamed.
+
+	The turbulence is given relative to the mean wind : the speed deviation is u / U and the heading deviation is the
+	angle of the lateral component, atan(v / U)
+	'''
+	__length_scale = 42 				# m, the turbulence scale parameter Lambda for hub heights above 60m
+	__lateral_ratio = 0.8 				# sigma_v / sigma_u
+
+	def __init__(self, mean_speed:float, turbulence_intensity:float=0.14, chunk_size:int=4096, overlap:int=256, \
+		sample_period:float=1):
+		'''
+		Inputs :
+			mean_speed 				- [m/s] The mean wind speed U that sets the time scales of the spectra
+			turbulence_intensity 	- [] sigma_u / U, 0.14 by default (IEC class B)
+			chunk_size 				- [] The number of samples of a chunk synthesized at once
+			overlap 				- [] The number of samples cross-faded between two chunks
+			sample_period 			- [s] The time between two samples
+		'''
+		self.mean_speed = max(abs(mean_speed), 0.1)
+		self.turbulence_intensity = turbulence_intensity
+		self.chunk_size = chunk_size
+		self.overlap = overlap
+		self.sample_period = sample_period
+
+		# Gains of the white noise spectrum such that each component has a unit variance and no mean
+		f = np.fft.rfftfreq(chunk_size, sample_period)
+		gains = []
+		for length in (8.1 * self.__length_scale, 2.7 * self.__length_scale):
+			spectrum = 4 * length / self.mean_speed / (1 + 6 * f * length / self.mean_speed)**(5/3)
+			spectrum[0] = 0
+			# Variance of the filtered noise, the bins between 0 and the Nyquist frequency count twice
+			weights = np.full(len(f), 2.0)
+			weights[0] = 1
+			if chunk_size % 2 == 0:
+				weights[-1] = 1
+			gains.append(np.sqrt(spectrum * chunk_size / np.sum(weights * spectrum)))
+		self.__gains = np.array(gains)
+		self.__scales = (turbulence_intensity, turbulence_intensity * self.__lateral_ratio)
+		angle = np.pi/2 * (np.arange(overlap) + 0.5) / overlap
+		self.__fade_out = np.cos(angle)
+		self.__fade_in = np.sin(angle)
+		self.__chunk = None
+		self.__position = 0
+
+	def sample(self, n_steps:int, samples_per_step:int, draws) -> tuple:
+		'''
+		Inputs :
+			n_steps 			- [] The number of steps
+			samples_per_step 	- [] The number of samples averaged in a step
+			draws 				- [Prefetched_draws] The standard normal draws of the white noise
+		Outputs :
+			speed_deviation 	- [] The relative speed deviation u / U of each step, an array of size n_steps
+			heading_deviation 	- [deg] The heading deviation of each step, an array of size n_steps
+		'''
+		samples = self.__take(n_steps * samples_per_step, draws)
+		if samples_per_step > 1:
+			samples = np.mean(samples.reshape(2, n_steps, samples_per_step), axis=2)
+		speed_deviation = self.__scales[0] * samples[0]
+		heading_deviation = np.arctan(self.__scales[1] * samples[1]) * 180/np.pi
+		return speed_deviation, heading_deviation
+
+	def sample_step(self, samples_per_step:int, draws) -> tuple:
+		'''
+		Same as sample for a single step, with python floats that avoid the numpy overhead of small arrays
+		'''
+		samples = self.__take(samples_per_step, draws)
+		u, v = (samples[:, 0] if samples_per_step == 1 else np.mean(samples, axis=1)).tolist()
+		return self.__scales[0] * u, float(np.arctan(self.__scales[1] * v)) * 180/np.pi
+
+	def __take(self, n_samples:int, draws) -> np.ndarray:
+		'''
+		The next n_samples unit variance samples of (u, v), an array of size 2 x n_samples
+		'''
+		n_emitted = self.chunk_size - self.overlap
+		if self.__chunk is None:
+			self.__chunk = self.__new_chunk(draws)
+			self.__chunk.flags.writeable = False
+		if self.__position + n_samples <= n_emitted:
+			samples = self.__chunk[:, self.__position:self.__position + n_samples]
+			self.__position += n_samples
+			return samples
+		parts = []
+		while n_samples > 0:
+			if self.__position == n_emitted:
+				# The tail of the chunk is cross-faded into the head of the next one
+				chunk = self.__new_chunk(draws)
+				chunk[:, :self.overlap] = self.__fade_out * self.__chunk[:, n_emitted:] \
+					+ self.__fade_in * chunk[:, :self.overlap]
+				chunk.flags.writeable = False
+				self.__chunk = chunk
+				self.__position = 0
+			n = min(n_samples, n_emitted - self.__position)
+			parts.append(self.__chunk[:, self.__position:self.__position + n])
+			self.__position += n
+			n_samples -= n
+		return np.concatenate(parts, axis=1)
+
+	def __new_chunk(self, draws) -> np.ndarray:
+		'''
+		A chunk of unit variance (u, v) samples, white noise filtered by the gains of the spectra
+		'''
+		noise = draws.take(2 * self.chunk_size).reshape(2, self.chunk_size)
+		return np.fft.irfft(np.fft.rfft(noise, axis=1) * self.__gains, n=self.chunk_size, axis=1)
+
+	def snapshot(self) -> tuple:
+		# The chunks are not modified once they are used, so the state can share them
+		return (self.__chunk, self.__position)
+
+	def restore(self, state:tuple):
+		self.__chunk, self.__position = state
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Parameter sweeps of the simulation with an on-disk cache of the results """
+# ---------------------------------------------------------------------------
+import glob
+import hashlib
+import itertools
+import json
+import os
+import numpy as np
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from wind_turbine import Wind_turbine, Wind
+from simu import Basic_agent, Simu
+from ensemble import summarize, summary_channels
+from turbine_models import data_dir
+
+# Parameters of a simulation of a Basic_agent. None stands for the default value of the model
+Sweep_config = namedtuple('Sweep_config', [
+	'threshold', 				# deg, deadzone of the Basic_agent
+	'yaw_control_step', 		# deg, rotation of an action of the wind turbine
+	'yaw_control_cost', 		# MW, power cost of an action
+	'rotor_cutoff', 			# Hz, cutoff frequency of the inertia filter
+	'c_speed_factor', 			# OU constants of the wind
+	'speed_noise',
+	'c_heading_factor',
+	'heading_noise',
+	'initial_speed', 			# m/s
+	'initial_heading', 			# deg
+	'step_duration', 			# s
+	'initial_estimated_heading', 	# deg
+	'has_inertia',
+	'max_steps'], 				# 24h by default
+	defaults=(None, None, None, None, None, None, None, None, 10, 270, 60, 270, True, None))
+
+# Source files whose changes change the results, their hash is part of the cache key
+source_files = ('wind_turbine.py', 'turbine_models.py', 'spectral_wind.py', 'simu.py', 'filters.py', 'math_utils.py', 'ensemble.py', 'sweep.py')
+result_names = ('energy', 'yaw_actions', 'mean_misalignment', 'max_misalignment')
+
+
+def grid(base=None, **values) -> list:
+	'''
+	Every combination of the values of the swept parameters
+	Inputs :
+		base 		- [Sweep_config] The values of the other parameters, the defaults by default
+		values 		- The list of values of each swept parameter, e.g. threshold=[2, 5, 10]
+	Outputs :
+		configs 	- A list of Sweep_config
+	'''
+	base = Sweep_config() if base is None else base
+	names = list(values.keys())
+	return [base._replace(**dict(zip(names, combination))) for combination in itertools.product(*values.values())]
+
+
+def random_samples(n_samples:int, seed=0, base=None, **ranges) -> list:
+	'''
+	Random configurations, each swept parameter is drawn uniformly in its range
+	Inputs :
+		n_samples 	- [] The number of configurations
+		seed 		- [] The seed of the draws
+		base 		- [Sweep_config] The values of the other parameters, the defaults by default
+		ranges 		- The (low, high) range of each swept parameter, e.g. yaw_control_cost=(0, 0.05)
+	Outputs :
+		configs 	- A list of Sweep_config
+	'''
+	base = Sweep_config() if base is None else base
+	rng = np.random.default_rng(seed)
+	draws = {name: rng.uniform(low, high, n_samples).tolist() for name, (low, high) in ranges.items()}
+	return [base._replace(**{name: draws[name][i] for name in ranges}) for i in range(n_samples)]
+
+
+def code_version() -> str:
+	'''
+	Hash of the source files of the simulation and of the turbine data files, so that the cached results are recomputed
+	when the code or a turbine model changes
+	'''
+	root = os.path.dirname(os.path.abspath(__file__))
+	sha = hashlib.sha256()
+	for file_name in [os.path.join(root, name) for name in source_files] + sorted(glob.glob(os.path.join(data_dir, '*.json'))):
+		with open(file_name, 'rb') as f:
+			sha.update(f.read())
+	return sha.hexdigest()
+
+
+def cache_key(config:Sweep_config, seed:int, version:str) -> str:
+	'''
+	Hash of a simulation, the numbers are hashed as floats so that e.g. a threshold of 5 or 5.0 is the same simulation
+	'''
+	values = {name: float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value \
+		for name, value in config._asdict().items()}
+	description = json.dumps({'config': values, 'seed': int(seed), 'code': version}, sort_keys=True)
+	return hashlib.sha256(description.encode()).hexdigest()
+
+
+def run_config(job) -> dict:
+	'''
+	Run one simulation of a configuration and summarize it
+	Input  : a tuple (config, seed)
+	Output : a dict with the energy, the yaw action count and the misalignment, see ensemble.summarize
+	'''
+	config, seed = job
+	wd = Wind(config.initial_speed, config.initial_heading, config.step_duration, 'OU', rng=np.random.default_rng(seed), \
+		c_speed_factor=config.c_speed_factor, speed_noise=config.speed_noise, c_heading_factor=config.c_heading_factor, \
+		heading_noise=config.heading_noise)
+	wt = Wind_turbine(config.initial_estimated_heading, config.has_inertia, rotor_cutoff=config.rotor_cutoff, \
+		yaw_control_step=config.yaw_control_step, yaw_control_cost=config.yaw_control_cost)
+	max_steps = int(np.ceil(24*3600 / wd.step_duration)) if config.max_steps is None else config.max_steps
+	sm = Simu(Basic_agent(config.threshold), wd, wt, max_steps, log_channels=summary_channels)
+	sm.run_simu()
+	result = summarize(sm)
+	# Plain python types, they are stored as json
+	return {name: float(result[name]) for name in result_names}
+
+
+def run_sweep(configs, seeds, cache_dir='sweep_cache', n_workers=None) -> dict:
+	'''
+	Run every (configuration, seed) simulation that is not in the cache, sharded across a pool of processes, and store
+	each result in the cache under a hash of the configuration, the seed and the code version. So re-running an
+	overlapping sweep only computes the new points.
+	Inputs :
+		configs 	- The list of Sweep_config, e.g. from grid or random_samples
+		seeds 		- [] The seeds of the wind, every configuration is run with each of them
+		cache_dir 	- The directory of the cached results
+		n_workers 	- [] The number of processes, the jobs are run in the current process if it is 1.
+					  By default it is the number of processors
+	Outputs :
+		results 	- A dict of arrays of shape (n_configs, n_seeds) : 'energy' [MWh], 'yaw_actions',
+					  'mean_misalignment' [deg] and 'max_misalignment' [deg], and 'n_computed' the number of simulations
+					  that were not in the cache
+	'''
+	os.makedirs(cache_dir, exist_ok=True)
+	version = code_version()
+	jobs = [(config, seed) for config in configs for seed in seeds]
+	paths = [os.path.join(cache_dir, cache_key(config, seed, version) + '.json') for config, seed in jobs]
+	missing = [i for i, path in enumerate(paths) if not os.path.exists(path)]
+
+	n_workers = os.cpu_count() if n_workers is None else n_workers
+	if n_workers == 1 or len(missing) <= 1:
+		job_results = map(run_config, [jobs[i] for i in missing])
+		store_results(job_results, [paths[i] for i in missing])
+	else:
+		with ProcessPoolExecutor(max_workers=n_workers) as executor:
+			job_results = executor.map(run_config, [jobs[i] for i in missing], \
+				chunksize=max(1, len(missing) // (4 * n_workers)))
+			store_results(job_results, [paths[i] for i in missing])
+
+	job_results = []
+	for path in paths:
+		with open(path) as f:
+			job_results.append(json.load(f))
+	results = {name: np.reshape([job_result[name] for job_result in job_results], (len(configs), len(seeds))) \
+		for name in result_names}
+	results['n_computed'] = len(missing)
+	return results
+
+
+def store_results(job_results, paths):
+	'''
+	Writes each result as soon as it is computed, through a temporary file so that an interrupted sweep never leaves a
+	partial result in the cache
+	'''
+	for job_result, path in zip(job_results, paths):
+		with open(path + '.tmp', 'w') as f:
+			json.dump(job_result, f)
+		os.replace(path + '.tmp', path)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Registry of the wind turbine models
+
+Usage :
+	spec = get_spec('V80/2000')
+	load_specs('my_fleet.json')
+	wt = Wind_turbine(270, True, spec='V80/2000')
+	farm = Wind_turbine_batch(3, specs=['V80/2000', 'my_model', 'my_model'])
+"""
+# ---------------------------------------------------------------------------
+import bisect
+import glob
+import json
+import os
+import numpy as np
+
+# Directory of the data files loaded with the registry, each file holds a list of specifications
+data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'turbine_data')
+default_spec = 'V80/2000'
+
+
+class Turbine_spec:
+	'''
+	Specification of a wind turbine model : mechanical data, power curve, yaw limits and control cost and dynamics of
+	the inertia filter. It is compiled once when it is created and is immutable, so that every wind turbine of the
+	model shares it : the power curve is kept in read-only arrays with the slopes of its linear interpolation, and as
+	python tuples for the scalar steps. The power tables of the model are built on demand and shared as well.
+	'''
+	fields = ('name', 'manufacturer', 'rated_power', 'rotor_diameter', 'nb_blades', 'power_control', 'min_rotor_speed', \
+		'max_rotor_speed', 'cut_in_wind_speed', 'cut_off_wind_speed', 'min_hub_height', 'max_hub_height', 'source', \
+		'yaw_cut_off', 'yaw_control_step', 'yaw_control_cost', 'heading_sensor_bias', 'rotor_cutoff', 'filter_order')
+
+	def __init__(self, name:str, power_curve, yaw_cut_off:float, yaw_control_step:float, yaw_control_cost:float, \
+		heading_sensor_bias:float=0, rotor_cutoff:float=1/60, filter_order:int=1, **details):
+		'''
+		Inputs :
+			name 				- [] The name of the model in the registry
+			power_curve 		- [m/s, kW] The increasing wind speeds and the power outputs of the power curve, as a pair of
+								  lists or as a dict {'wind_speed': [...], 'power': [...]}
+			yaw_cut_off 		- [deg] The maximum yaw relative to the wind that the structure can handle
+			yaw_control_step 	- [deg] The rotation of an action
+			yaw_control_cost 	- [MW] The power cost of an action
+			heading_sensor_bias - [deg] The bias of the heading sensor
+			rotor_cutoff 		- [Hz] The cutoff frequency of the inertia low-pass filter
+			filter_order 		- [] The order of the inertia low-pass filter
+			details 			- The other fields, e.g. manufacturer, rated_power [MW] or rotor_diameter [m]
+		'''
+		unknown = set(details) - set(self.fields)
+		if len(unknown) > 0:
+			raise ValueError('Unknown fields of the wind turbine ' + name + ' : ' + ', '.join(sorted(unknown)))
+		if isinstance(power_curve, dict):
+			power_curve = (power_curve['wind_speed'], power_curve['power'])
+		speeds = np.array(power_curve[0], dtype=float)
+		powers = np.array(power_curve[1], dtype=float)
+		if len(speeds) < 2 or len(speeds) != len(powers) or np.any(np.diff(speeds) <= 0):
+			raise ValueError('The power curve of the wind turbine ' + name + ' needs increasing wind speeds and one power per speed')
+		slopes = np.diff(powers) / np.diff(speeds)
+		for array in (speeds, powers, slopes):
+			array.flags.writeable = False
+
+		values = {field: None for field in self.fields}
+		values.update(details)
+		values.update(name=name, yaw_cut_off=yaw_cut_off, yaw_control_step=yaw_control_step, \
+			yaw_control_cost=yaw_control_cost, heading_sensor_bias=heading_sensor_bias, rotor_cutoff=rotor_cutoff, \
+			filter_order=filter_order)
+		values['rated_power'] = float(np.max(powers)) / 1e3 if values['rated_power'] is None else values['rated_power']
+		values.update(curve_speeds=speeds, curve_powers=powers, curve_slopes=slopes, \
+			power_curve=(tuple(speeds.tolist()), tuple(powers.tolist())), _Turbine_spec__slopes=tuple(slopes.tolist()), \
+			_Turbine_spec__power_tables={})
+		for field, value in values.items():
+			object.__setattr__(self, field, value)
+
+	def __setattr__(self, name, value):
+		raise AttributeError('A Turbine_spec is immutable, register a new specification instead')
+
+	def facing_power(self, wind_speed):
+		'''
+		[MW] The power output facing the wind, np.interp of the power curve for a scalar or an array of wind speeds [m/s]
+		'''
+		return np.interp(wind_speed, self.curve_speeds, self.curve_powers)/1e3
+
+	def scalar_facing_power(self, wind_speed:float) -> float:
+		'''
+		Same as facing_power for a python float, with the precomputed slopes and the operations of np.interp, so that
+		the result is identical without the numpy overhead
+		'''
+		speeds, powers = self.power_curve
+		if wind_speed != wind_speed:
+			# A missing sample, NaN as with np.interp
+			return wind_speed
+		if wind_speed > speeds[-1]:
+			return powers[-1]/1e3
+		if wind_speed < speeds[0]:
+			return powers[0]/1e3
+		j = bisect.bisect_right(speeds, wind_speed) - 1
+		if j == len(speeds) - 1 or speeds[j] == wind_speed:
+			return powers[j]/1e3
+		return (self.__slopes[j] * (wind_speed - speeds[j]) + powers[j])/1e3
+
+	def power_table(self, max_error:float=1e-6) -> 'Power_table':
+		'''
+		The power table of this model for a given maximum error in MW, it is built once and shared
+		'''
+		# Imported here as wind_turbine imports this module
+		from wind_turbine import Power_table
+		if max_error not in self.__power_tables:
+			self.__power_tables[max_error] = Power_table((self.curve_speeds, self.curve_powers), self.yaw_cut_off, max_error)
+		return self.__power_tables[max_error]
+
+	@classmethod
+	def from_dict(cls, data:dict) -> 'Turbine_spec':
+		return cls(**data)
+
+	def __repr__(self):
+		return 'Turbine_spec(' + repr(self.name) + ')'
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str({field: getattr(self, field) for field in self.fields})
+
+
+# Registered specifications by name, the data files of data_dir are loaded on the first access
+_registry = {}
+_data_loaded = False
+
+
+def register(spec:Turbine_spec) -> Turbine_spec:
+	'''
+	Adds a specification to the registry, it replaces a specification of the same name
+	'''
+	_registry[spec.name] = spec
+	return spec
+
+
+def read_specs(file_name:str) -> list:
+	'''
+	Reads the specifications of a json file, a list of objects with the arguments of Turbine_spec, or a single object
+	Output : specs - The list of the Turbine_spec of the file
+	'''
+	with open(file_name) as f:
+		data = json.load(f)
+	return [Turbine_spec.from_dict(item) for item in (data if isinstance(data, list) else [data])]
+
+
+def load_specs(file_name:str) -> list:
+	'''
+	Registers the specifications of a json file, see read_specs
+	'''
+	return [register(spec) for spec in read_specs(file_name)]
+
+
+def _load_data_dir():
+	global _data_loaded
+	if not _data_loaded:
+		_data_loaded = True
+		for file_name in sorted(glob.glob(os.path.join(data_dir, '*.json'))):
+			for spec in read_specs(file_name):
+				# The specifications registered by the user take precedence over the data files
+				_registry.setdefault(spec.name, spec)
+
+
+def get_spec(spec=None) -> Turbine_spec:
+	'''
+	Input  : spec - The name of a registered model, or a Turbine_spec that is returned as is. The V80 by default
+	Output : the Turbine_spec
+	'''
+	if isinstance(spec, Turbine_spec):
+		return spec
+	name = default_spec if spec is None else spec
+	if name not in _registry:
+		_load_data_dir()
+	if name not in _registry:
+		raise KeyError('Unknown wind turbine model ' + str(name) + ', the registered ones are ' + ', '.join(spec_names()))
+	return _registry[name]
+
+
+def spec_names() -> list:
+	_load_data_dir()
+	return sorted(_registry)
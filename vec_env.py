@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Vectorized environment running many wind and wind turbine copies for RL training """
+# ---------------------------------------------------------------------------
+import numpy as np
+from math_utils import wrap_to_m180_p180
+from wind_turbine import Wind_turbine_batch, Wind
+
+
+class Vec_env:
+	'''
+	B independent copies of the Wind + Wind_turbine pair of Simu, stepped together with array operations.
+	The observation is the estimated relative wind heading seen by the agent in Simu.step and the reward is the
+	power output of the wind turbine. A copy is reset as soon as its episode is done, independently of the others.
+
+	The wind does not depend on the actions, so the wind of each copy is generated by chunks of chunk_steps steps
+	with Wind.generate and only read during the steps.
+	'''
+	def __init__(self, n_envs, episode_steps=None, wind_config=None, turbine_config=None, seed=None, chunk_steps=None):
+		'''
+		Inputs :
+			n_envs 			- [] The number of copies B
+			episode_steps 	- [] The number of steps of an episode, 24h by default
+			wind_config 	- The Wind arguments, e.g. {'initial_speed': 10, 'initial_heading': 0, 'step_duration': 1}
+			turbine_config 	- The Wind_turbine arguments, e.g. {'initial_estimated_heading': 0, 'has_inertia': False}, given
+							  to the Wind_turbine_batch of the copies
+			seed 			- [] The seed of the environment, each copy draws its wind from its own generator
+			chunk_steps 	- [] The number of wind steps generated at once for a copy, at least 2. 3600 by default
+		'''
+		self.n_envs = n_envs
+		self.wind_config = {'initial_speed': 10, 'initial_heading': 0, 'step_duration': 1} if wind_config is None else wind_config
+		turbine_config = {} if turbine_config is None else turbine_config
+		step_duration = Wind(**self.wind_config).step_duration
+		self.episode_steps = int(np.ceil(24*3600 / step_duration)) if episode_steps is None else episode_steps
+		self.chunk_steps = 3600 if chunk_steps is None else chunk_steps
+
+		# The arguments of Wind_turbine that have another name in Wind_turbine_batch, the unknown ones raise a TypeError
+		batch_names = {'initial_estimated_heading': 'initial_estimated_headings', 'spec': 'specs'}
+		self.wt = Wind_turbine_batch(n_envs, **{batch_names.get(name, name): value for name, value in turbine_config.items()})
+		self.__rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n_envs)]
+		self.__winds = n_envs * [None]
+		self.__wind_speed = np.zeros((n_envs, self.chunk_steps))
+		self.__wind_heading = np.zeros((n_envs, self.chunk_steps))
+		self.__chunk_index = np.zeros(n_envs, dtype=int)
+		self.step_count = np.zeros(n_envs, dtype=int)
+
+	def reset(self):
+		'''
+		Resets all the copies
+		Output : obs - [deg] The relative wind heading of each copy, an array of size B
+		'''
+		self.__reset(np.ones(self.n_envs, dtype=bool))
+		return self.__observation()
+
+	def step(self, actions):
+		'''
+		Applies one action per copy, copies whose episode is done are reset
+		Input  : actions 	- {0, 1, 2} An array of size B, 0 is rotate trigo, 1 is 'do nothing', 2 is rotate clockwise
+		Output : obs 		- [deg] The relative wind heading of each copy after the step, or after the reset of the done copies
+				 reward 	- [MW] The power output of each copy
+				 done 		- [bool] Whether the episode of each copy ended with this step
+		'''
+		rows = np.arange(self.n_envs)
+		reward = self.wt.step(self.__wind_speed[rows, self.__chunk_index], \
+			self.__wind_heading[rows, self.__chunk_index], actions)
+
+		self.step_count += 1
+		self.__chunk_index += 1
+		done = self.step_count >= self.episode_steps
+		for i in np.nonzero((self.__chunk_index >= self.chunk_steps) & ~done)[0]:
+			self.__fill(i)
+		if np.any(done):
+			self.__reset(done)
+		return self.__observation(), reward, done
+
+	def rollout(self, agent, n_steps:int):
+		'''
+		Runs n_steps steps from a reset with the batched policy of an agent, see Basic_agent.policy_batch
+		Inputs :
+			agent 		- The agent, it must implement policy_batch
+			n_steps 	- [] The number of steps
+		Outputs :
+			reward 		- [MW] The power output of each step and copy, an array of size n_steps x B
+			done 		- [bool] The end of episode flags, an array of size n_steps x B
+		'''
+		reward = np.zeros((n_steps, self.n_envs))
+		done = np.zeros((n_steps, self.n_envs), dtype=bool)
+		obs = self.reset()
+		for t in range(n_steps):
+			obs, reward[t], done[t] = self.step(agent.policy_batch(obs))
+		return reward, done
+
+	def __reset(self, mask):
+		self.wt.reset(mask)
+		self.step_count[mask] = 0
+		for i in np.nonzero(mask)[0]:
+			self.__winds[i] = Wind(**self.wind_config, rng=self.__rngs[i])
+			# The first sample is the initial wind, as in Simu
+			self.__wind_speed[i, 0] = self.__winds[i].speed
+			self.__wind_heading[i, 0] = self.__winds[i].heading
+			self.__wind_speed[i, 1:], self.__wind_heading[i, 1:] = self.__winds[i].generate(self.chunk_steps - 1)
+			self.__chunk_index[i] = 0
+
+	def __fill(self, i):
+		'''
+		Generates the next chunk of wind of the copy i
+		'''
+		self.__wind_speed[i], self.__wind_heading[i] = self.__winds[i].generate(self.chunk_steps)
+		self.__chunk_index[i] = 0
+
+	def __observation(self):
+		rows = np.arange(self.n_envs)
+		return wrap_to_m180_p180(self.__wind_heading[rows, self.__chunk_index] - self.wt.heading)
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Environment to simulate a wind farm under one wind field with wake losses """
+# ---------------------------------------------------------------------------
+import numpy as np
+from math_utils import wrap_to_m180_p180, make_rng
+from filters import lfilter
+from wind_turbine import Wind_turbine_batch, Wind
+from turbine_models import get_spec
+
+
+def grid_layout(n_rows:int, n_cols:int, row_spacing:float=None, col_spacing:float=None, row_heading:float=0) -> np.ndarray:
+	'''
+	Positions of the wind turbines of a regular grid
+	Inputs :
+		n_rows 			- [] The number of rows
+		n_cols 			- [] The number of wind turbines per row
+		row_spacing 	- [m] The distance between two rows, 7 rotor diameters of the default model by default
+		col_spacing 	- [m] The distance between two wind turbines of a row, 5 rotor diameters of the default model by default
+		row_heading 	- [deg] The direction of the rows wrt North, 0 means rows aligned with the East
+	Outputs :
+		layout 			- [m] An array of size n_rows * n_cols x 2 with the East and North coordinates
+	'''
+	diameter = get_spec().rotor_diameter
+	row_spacing = 7 * diameter if row_spacing is None else row_spacing
+	col_spacing = 5 * diameter if col_spacing is None else col_spacing
+	rows, cols = np.meshgrid(np.arange(n_rows) * row_spacing, np.arange(n_cols) * col_spacing, indexing='ij')
+	angle = row_heading * np.pi/180
+	east = cols * np.cos(angle) - rows * np.sin(angle)
+	north = cols * np.sin(angle) + rows * np.cos(angle)
+	return np.column_stack((east.ravel(), north.ravel()))
+
+
+class Wind_farm:
+	'''
+	N wind turbines, Vestas V80 by default, placed on a layout and driven by one wind field, stepped together with array operations.
+
+	Wind field : the Wind instance is the free wind at the upwind edge of the farm. It is advected through the farm
+	at the wind speed (frozen turbulence), so a turbine sees it with a delay equal to its downwind distance divided by
+	the wind speed. On top of it each turbine sees a local Ornstein-Uhlenbeck fluctuation of the speed and of the
+	heading, whose draws are correlated between turbines with exp(-distance / correlation_length).
+
+	Wakes : Jensen top hat model. The wake of a turbine expands linearly with the downwind distance x, its radius is
+	R + k x, and the speed deficit inside the wake is (1 - sqrt(1 - Ct cos²γ)) (R / (R + k x))², where γ is the yaw
+	misalignment of the upwind turbine. The wake is deflected sideways by a yawed rotor following Jimenez et al. 2010,
+	which allows to study wake steering. The deficit seen by a rotor is weighted by the part of the rotor inside the
+	wake and the deficits of several wakes are summed quadratically. The wakes of a step are computed with the yaw of
+	the turbines at the beginning of the step. With turbines of several models, R and the rotor diameter of the
+	deflection are the ones of the upwind turbine and the overlap is the part of the downwind rotor in the wake, the
+	thrust coefficient is the one of the V80 for every model.
+
+	The wind field does not depend on the actions, so it is generated by chunks of chunk_steps steps.
+	'''
+	__thrust_coefficient = 0.8 				# [], Ct of the V80 below rated wind speed
+	__wake_expansion = 0.075 				# [], k of the Jensen model for onshore farms
+	__deflection_factor = 2 * __wake_expansion 	# [], β of the Jimenez wake deflection model
+	__correlation_length = 1000 			# m, distance at which the local fluctuations are correlated by 1/e
+	__local_time_constant = 60 				# s, time constant of the local fluctuations
+	__local_speed_noise = 0.05 				# [], standard deviation of the local speed fluctuation relative to the wind speed
+	__local_heading_noise = 2 				# deg, standard deviation of the local heading fluctuation
+	__min_advection_speed = 1 				# m/s, lower bound of the speed used for the advection delay
+	__pair_heading_resolution = 1 			# deg, width of the wind heading bins of the wake pair candidates
+
+	def __init__(self, layout, wind_model=None, initial_estimated_headings=None, has_inertia=None, power_table=None, \
+		rng=None, chunk_steps=None, specs=None):
+		'''
+		Inputs :
+			layout 						- [m] An array of size N x 2 with the East and North coordinates of the turbines,
+										  e.g. from grid_layout
+			wind_model 					- The free wind at the upwind edge of the farm, a Wind instance by default
+			initial_estimated_headings 	- [deg] The estimated headings, a scalar or an array of size N
+			has_inertia 				- [bool] Determines whether the output power will be filtered
+			power_table 				- [Power_table] If given, the power is read from this table, see Turbine_spec.power_table
+			rng 						- The random generator of the local fluctuations, see make_rng : a seed, a numpy Generator or
+										  RandomState. By default the global numpy random state is used
+			chunk_steps 				- [] The number of wind steps generated at once, 3600 by default
+			specs 						- The models of the turbines, see Wind_turbine_batch, V80/2000 by default
+		Outputs :
+			power_output 				- [MW] An array of size N
+		'''
+		self.layout = np.asarray(layout, dtype=float)
+		self.n_turbines = len(self.layout)
+		self.wd = Wind(10, 0, 1, 'OU') if wind_model is None else wind_model
+		self.wt = Wind_turbine_batch(self.n_turbines, initial_estimated_headings, has_inertia, power_table, specs=specs)
+		self.rotor_diameter = np.array([spec.rotor_diameter for spec in self.wt.specs], dtype=float) 	# m
+		self.chunk_steps = 3600 if chunk_steps is None else chunk_steps
+		self.__rng = make_rng(rng)
+		self.step_count = 0
+
+		# Cholesky factor of the spatial correlation of the local fluctuations
+		distance = np.linalg.norm(self.layout[:, None, :] - self.layout[None, :, :], axis=-1)
+		correlation = np.exp(-distance / self.__correlation_length)
+		self.__correlation_factor = np.linalg.cholesky(correlation + 1e-9 * np.eye(self.n_turbines))
+		self.__local_factor = (1 - 1/self.__local_time_constant)**self.wd.step_duration
+		self.__local = np.zeros((self.n_turbines, 2))
+
+		# History of the free wind at the upwind edge of the farm, long enough to cross the farm at the lowest speed.
+		# The advection distances are taken from a circle around the farm, so that they are positive for any heading
+		self.__center = np.mean(self.layout, axis=0)
+		self.__radius = np.max(np.linalg.norm(self.layout - self.__center, axis=1))
+		self.__history_steps = int(np.ceil(2 * self.__radius / (self.__min_advection_speed * self.wd.step_duration))) + 2
+		self.__speed_history = np.full(self.__history_steps, float(self.wd.speed))
+		self.__heading_history = np.full(self.__history_steps, float(self.wd.heading))
+		self.__history_index = 0
+		self.__wake_pairs = {}
+
+		# The first step sees the initial wind, as in Simu, and reads the first sample of the chunk afterwards
+		self.__fill()
+		self.__chunk_index = -1
+		self.__update_wind()
+
+	def observation(self) -> np.ndarray:
+		'''
+		Output : rel_wind_heading - [deg] The estimated relative wind heading of each turbine, an array of size N
+		'''
+		return wrap_to_m180_p180(self.wind_heading - self.wt.heading)
+
+	def step(self, actions) -> np.ndarray:
+		'''
+		Takes an action per wind turbine, returns the output powers and moves the wind field to the next step
+		Input  : actions 		- {0, 1, 2} An array of size N, 0 is rotate trigo, 1 is 'do nothing', 2 is rotate clockwise
+		Output : power_output 	- [MW] An array of size N
+		'''
+		power_output = self.wt.step(self.wind_speed, self.wind_heading, actions)
+
+		self.step_count += 1
+		self.__chunk_index += 1
+		if self.__chunk_index >= self.chunk_steps:
+			self.__fill()
+		self.__history_index = (self.__history_index + 1) % self.__history_steps
+		self.__speed_history[self.__history_index] = self.__chunk_speed[self.__chunk_index]
+		self.__heading_history[self.__history_index] = self.__chunk_heading[self.__chunk_index]
+		self.__local = self.__chunk_local[self.__chunk_index]
+		self.__update_wind()
+		return power_output
+
+	def rollout(self, agent, n_steps:int, log_every:int=1):
+		'''
+		Runs n_steps steps with the batched policy of an agent, see Basic_agent.policy_batch
+		Inputs :
+			agent 		- The agent, it must implement policy_batch
+			n_steps 	- [] The number of steps
+			log_every 	- [] Only one step every log_every steps is logged
+		Outputs :
+			power 		- [MW] The float32 power output of each logged step and turbine, an array of size n_logs x N
+		'''
+		power = np.zeros((-(-n_steps // log_every), self.n_turbines), dtype=np.float32)
+		for t in range(n_steps):
+			power_output = self.step(agent.policy_batch(self.observation()))
+			if t % log_every == 0:
+				power[t // log_every] = power_output
+		return power
+
+	def __fill(self):
+		'''
+		Generates the next chunk of the free wind and of the local fluctuations
+		'''
+		self.__chunk_speed, self.__chunk_heading = self.wd.generate(self.chunk_steps)
+		# Correlated draws of every turbine, then the Ornstein-Uhlenbeck recursion of each turbine along the chunk
+		noise = np.matmul(self.__correlation_factor, self.__rng.standard_normal((self.chunk_steps, self.n_turbines, 2)))
+		r = self.__local_factor
+		self.__chunk_local = lfilter([np.sqrt(1 - r*r)], [1., -r], noise, axis=0, zi=r * self.__local[None])[0]
+		self.__chunk_index = 0
+
+	def __update_wind(self):
+		'''
+		Free wind seen by each turbine, then wind speed inside the wakes
+		'''
+		# Advection delay along the current wind heading, read with a linear interpolation in the history
+		speed = max(self.__speed_history[self.__history_index], self.__min_advection_speed)
+		downwind, crosswind = self.__wind_frame(self.__heading_history[self.__history_index])
+		delay = np.minimum((downwind + self.__radius) / (speed * self.wd.step_duration), self.__history_steps - 2)
+		i_delay = delay.astype(int)
+		w_delay = delay - i_delay
+		k0 = (self.__history_index - i_delay) % self.__history_steps
+		k1 = (k0 - 1) % self.__history_steps
+		free_speed = (1 - w_delay) * self.__speed_history[k0] + w_delay * self.__speed_history[k1]
+		free_heading = self.__heading_history[k0] + w_delay \
+			* wrap_to_m180_p180(self.__heading_history[k1] - self.__heading_history[k0])
+
+		free_speed = free_speed * (1 + self.__local_speed_noise * self.__local[:, 0])
+		self.wind_heading = np.mod(free_heading + self.__local_heading_noise * self.__local[:, 1], 360)
+		self.free_wind_speed = np.maximum(free_speed, 0)
+		self.wind_speed = self.free_wind_speed * (1 - self.__wake_deficit(downwind, crosswind))
+
+	def __wind_frame(self, wind_heading:float):
+		'''
+		Downwind and crosswind coordinates of the turbines relative to the center of the farm, the wind heading being
+		the direction the wind comes from
+		'''
+		angle = wind_heading * np.pi/180
+		east, north = (self.layout - self.__center).T
+		downwind = -(east * np.sin(angle) + north * np.cos(angle))
+		crosswind = east * np.cos(angle) - north * np.sin(angle)
+		return downwind, crosswind
+
+	def __wake_deficit(self, downwind:np.ndarray, crosswind:np.ndarray) -> np.ndarray:
+		'''
+		Relative speed deficit of each turbine due to the wakes of the upwind turbines
+		'''
+		radius = self.rotor_diameter / 2
+		yaw = wrap_to_m180_p180(self.wind_heading - self.wt.true_heading) * np.pi/180
+		thrust = self.__thrust_coefficient * np.cos(yaw)**2
+		# Pairs (upwind j, downwind i) that can be in a wake and downwind distance between them
+		i, j = self.__pairs(self.__heading_history[self.__history_index])
+		dx = downwind[i] - downwind[j]
+		upwind = dx > 0
+		i, j, dx = i[upwind], j[upwind], dx[upwind]
+		expansion = 1 + self.__wake_expansion * dx / radius[j]
+		deficit = (1 - np.sqrt(1 - thrust[j])) / (expansion * expansion)
+		# Jimenez deflection of the wake center, the initial skew angle is Ct cos²γ sinγ / 2
+		skew = thrust[j] * np.sin(yaw[j]) / 2
+		deflection = skew * dx / (1 + self.__deflection_factor * dx / self.rotor_diameter[j])
+		offset = np.abs(crosswind[i] - crosswind[j] - deflection)
+		deficit = deficit * self.__overlap(offset, radius[i], radius[j] * expansion)
+		return np.minimum(np.sqrt(np.bincount(i, deficit * deficit, self.n_turbines)), 1)
+
+	def __pairs(self, wind_heading:float):
+		'''
+		Pairs of turbines (downwind i, upwind j) that can be in a wake for a wind heading, the other pairs are too far
+		crosswind whatever the yaw. The pairs are computed once per heading bin, with a margin for the headings of the bin
+		'''
+		heading_bin = int(np.round(wind_heading / self.__pair_heading_resolution)) % int(360 / self.__pair_heading_resolution)
+		if heading_bin not in self.__wake_pairs:
+			radius = self.rotor_diameter / 2
+			downwind, crosswind = self.__wind_frame(heading_bin * self.__pair_heading_resolution)
+			dx = downwind[:, None] - downwind[None, :]
+			dy = np.abs(crosswind[:, None] - crosswind[None, :])
+			distance = np.hypot(dx, dy)
+			margin = distance * np.sin(self.__pair_heading_resolution * np.pi/180)
+			# The largest skew angle is Ct cos²γ sinγ / 2 at sinγ = 1/sqrt(3), it bounds the deflection
+			max_deflection = self.__thrust_coefficient / 3**1.5 * np.maximum(dx, 0) \
+				/ (1 + self.__deflection_factor * np.maximum(dx, 0) / self.rotor_diameter[None, :])
+			reach = radius[:, None] + radius[None, :] + self.__wake_expansion * np.maximum(dx + margin, 0) + max_deflection \
+				+ margin
+			self.__wake_pairs[heading_bin] = np.nonzero((dx > -margin) & (dy < reach) & (distance > 0))
+		return self.__wake_pairs[heading_bin]
+
+	@staticmethod
+	def __overlap(distance:np.ndarray, radius:np.ndarray, wake_radius:np.ndarray) -> np.ndarray:
+		'''
+		Part of the rotor disc of radius radius inside the wake disc of radius wake_radius, their centers being distance
+		apart. A wake smaller than the rotor covers at most (wake_radius / radius)² of it
+		'''
+		overlap = np.where(distance <= np.abs(wake_radius - radius), np.minimum(wake_radius, radius)**2 / radius**2, 0.0)
+		partial = np.nonzero((distance > np.abs(wake_radius - radius)) & (distance < wake_radius + radius))[0]
+		d, r, R = distance[partial], radius[partial], wake_radius[partial]
+		area = r*r * np.arccos(np.clip((d*d + r*r - R*R) / (2*d*r), -1, 1)) \
+			+ R*R * np.arccos(np.clip((d*d + R*R - r*r) / (2*d*R), -1, 1)) \
+			- 0.5 * np.sqrt(np.maximum((-d + r + R) * (d + r - R) * (d - r + R) * (d + r + R), 0))
+		overlap[partial] = area / (np.pi * r*r)
+		return overlap
+
+	@property
+	def power_capacity(self): 	# MW
+		return np.sum(self.wt.rated_power)
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
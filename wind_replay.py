@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+# Created By  : Paul Aubin
+# Created Date: 2026/10/17
+# ---------------------------------------------------------------------------
+""" Replay of recorded wind measurements """
+# ---------------------------------------------------------------------------
+import copy
+import itertools
+import struct
+import zipfile
+import numpy as np
+from collections import namedtuple
+
+# State of a recorded wind : the buffer is shared and not copied, it is never modified in place. The reader offset is
+# the position of the chunked reader after the data of the buffer, in rows of a .npz file or in bytes of a .csv file,
+# None before the first chunk
+Recorded_wind_state = namedtuple('Recorded_wind_state', ['position', 'buffer', 'reader_offset', 'speed', 'heading'])
+
+
+class Recorded_wind:
+	'''
+	Wind source that replays recorded wind speed and heading samples, e.g. 1Hz met-mast or SCADA data, with the same
+	step()/speed/heading interface as Wind so that it can be given to Simu. The samples are streamed from disk :
+	.npy files are memory-mapped and .npz or .csv files are read by chunks, so a year of data is never loaded at once.
+	Each step averages the samples of step_duration seconds, the headings being unwrapped before averaging.
+	'''
+	def __init__(self, source, step_duration=None, sample_period=None, columns=(0, 1), chunk_size=None, key=None, skiprows=0):
+		'''
+		Inputs :
+			source 			- A .npy, .npz or .csv file name, or an array of samples
+			step_duration 	- [s] The duration of a time step, 1s by default
+			sample_period 	- [s] The time between two recorded samples, 1s by default
+			columns 		- [] The columns of the wind speed [m/s] and of the wind heading wrt North [deg]
+			chunk_size 		- [] The number of samples read at once from .npz and .csv files, 65536 by default
+			key 			- [] The name of the array in a .npz file, the first array by default
+			skiprows 		- [] The number of header lines of a .csv file
+		Outputs :
+			heading 		- [deg]
+			speed 			- [m/s]
+		'''
+		self.step_duration = 1 if step_duration is None else step_duration
+		self.sample_period = 1 if sample_period is None else sample_period
+		self.columns = list(columns)
+		self.chunk_size = 65536 if chunk_size is None else chunk_size
+		self.__samples_per_step = max(1, int(np.ceil(self.step_duration / self.sample_period)))
+
+		self.__source = source
+		self.__key = key
+		self.__skiprows = skiprows
+		self.__reader = None
+		self.__reader_offset = None
+		if isinstance(source, str) and source.endswith(('.npz', '.csv')):
+			self.__reader = self.__open_reader(None)
+		elif isinstance(source, str):
+			source = np.load(source, mmap_mode='r')
+		# Arrays and memory-mapped files are sliced in place, the chunked readers fill a buffer
+		self.__buffer = np.zeros((0, len(self.columns))) if self.__reader is not None else source
+		# The columns of the speed and heading in the buffer, the chunks only keep these columns
+		self.__columns = (0, 1) if self.__reader is not None else tuple(self.columns)
+		self.__position = 0
+
+		# The first sample is the initial wind
+		first = self.__take(1)
+		if len(first) == 0:
+			raise EOFError('The recorded wind has no sample')
+		self._speed = float(first[0, 0])
+		self._heading = float(first[0, 1])
+
+	def step(self, step_duration=None):
+		'''
+		Input : step_duration - [s] The duration of this step, step_duration by default. It allows variable steps
+		'''
+		samples_per_step = self.__samples_per_step if step_duration is None \
+			else max(1, int(np.ceil(step_duration / self.sample_period)))
+		if samples_per_step == 1:
+			self.__step_sample()
+		else:
+			self.__average(1, samples_per_step)
+
+	def __step_sample(self):
+		'''
+		A step of a single sample, the operations of __average on python floats, which avoids the numpy overhead
+		'''
+		if self.__position < len(self.__buffer):
+			speed = float(self.__buffer[self.__position, self.__columns[0]])
+			heading = float(self.__buffer[self.__position, self.__columns[1]])
+			self.__position += 1
+		else:
+			sample = self.__take(1)
+			if len(sample) == 0:
+				raise EOFError('The recorded wind is exhausted')
+			speed, heading = float(sample[0, 0]), float(sample[0, 1])
+		# np.unwrap from the current heading
+		jump = heading - self._heading
+		if not abs(jump) < 180:
+			jump_mod = (jump + 180) % 360 - 180
+			if jump_mod == -180 and jump > 0:
+				jump_mod = 180.0
+			heading = heading + (jump_mod - jump)
+		self._speed = speed
+		self._heading = heading % 360
+
+	def generate(self, n_steps:int):
+		'''
+		Runs n_steps steps at once
+		Inputs :
+			n_steps 	- [] The number of steps
+		Outputs :
+			speed 		- [m/s] Array of size n_steps with the wind speed after each step
+			heading 	- [deg] Array of size n_steps with the wind heading after each step
+		'''
+		return self.__average(n_steps, self.__samples_per_step)
+
+	def __average(self, n_steps:int, samples_per_step:int):
+		'''
+		Reads the samples of n_steps steps and averages the samples of each step
+		'''
+		samples = self.__take(n_steps * samples_per_step)
+		if len(samples) < n_steps * samples_per_step:
+			raise EOFError('The recorded wind is exhausted')
+		samples = samples.reshape(n_steps, samples_per_step, 2)
+		speed = np.mean(samples[:, :, 0], axis=1)
+		# The headings are unwrapped from the current heading so that their mean does not jump at North
+		heading = np.unwrap(np.concatenate(([self._heading], samples[:, :, 1].ravel())), period=360)[1:]
+		heading = np.mod(np.mean(heading.reshape(n_steps, samples_per_step), axis=1), 360)
+		self._speed = float(speed[-1])
+		self._heading = float(heading[-1])
+		return speed, heading
+
+	@property
+	def n_steps(self):
+		'''
+		The number of remaining steps, None when it is not known before reading the whole file
+		'''
+		if self.__reader is not None:
+			return None
+		return (len(self.__buffer) - self.__position) // self.__samples_per_step
+
+	def __take(self, n_samples:int) -> np.ndarray:
+		'''
+		The next n_samples (speed, heading) samples, fewer if the recording ends before
+		'''
+		if self.__reader is None:
+			samples = self.__buffer[self.__position:self.__position + n_samples, self.columns]
+		else:
+			while len(self.__buffer) - self.__position < n_samples:
+				chunk = next(self.__reader, None)
+				if chunk is None:
+					break
+				self.__buffer = np.concatenate((self.__buffer[self.__position:], chunk[:, self.columns]))
+				self.__position = 0
+			samples = self.__buffer[self.__position:self.__position + n_samples]
+		self.__position += len(samples)
+		return np.asarray(samples, dtype=float)
+
+	def __open_reader(self, offset):
+		'''
+		The chunked reader of the file, from the reader offset of a state, see Recorded_wind_state
+		'''
+		if self.__source.endswith('.npz'):
+			return self.__npz_chunks(self.__source, self.__key, 0 if offset is None else offset)
+		return self.__csv_chunks(self.__source, self.__skiprows, offset)
+
+	def __npz_chunks(self, file_name:str, key, offset:int=0):
+		'''
+		Reads an array of a .npz archive by chunks of rows, without loading the whole array. The array of an uncompressed
+		archive, as written by np.savez, is read directly from the archive file, so that starting at offset rows is a seek.
+		A compressed array is decompressed up to the offset
+		'''
+		with zipfile.ZipFile(file_name) as archive:
+			name = archive.namelist()[0] if key is None else key + '.npy'
+			info = archive.getinfo(name)
+			with archive.open(name) as f:
+				version = np.lib.format.read_magic(f)
+				if version == (1, 0):
+					shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+				else:
+					shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+				header_size = f.tell()
+			if fortran_order:
+				raise ValueError('Fortran ordered arrays can not be streamed from ' + file_name)
+			row_bytes = (int(np.prod(shape[1:])) if len(shape) > 1 else 1) * dtype.itemsize
+			if info.compress_type == zipfile.ZIP_STORED:
+				f = open(file_name, 'rb')
+				# The data of the member follows its local header, whose name and extra field sizes are at bytes 26-29
+				f.seek(info.header_offset)
+				name_size, extra_size = struct.unpack('<HH', f.read(30)[26:30])
+				f.seek(info.header_offset + 30 + name_size + extra_size + header_size + offset * row_bytes)
+			else:
+				f = archive.open(name)
+				f.seek(header_size + offset * row_bytes)
+			with f:
+				n_rows = shape[0] - offset
+				while n_rows > 0:
+					data = f.read(min(self.chunk_size, n_rows) * row_bytes)
+					if len(data) == 0:
+						return
+					chunk = np.frombuffer(data, dtype=dtype).reshape(-1, *shape[1:])
+					n_rows -= len(chunk)
+					self.__reader_offset = shape[0] - n_rows
+					yield chunk
+
+	def __csv_chunks(self, file_name:str, skiprows:int, offset:int=None):
+		'''
+		Reads a .csv file by chunks of lines, from the byte offset if it is given. The file is read in binary mode so
+		that its position is known after each chunk
+		'''
+		with open(file_name, 'rb') as f:
+			if offset is None:
+				for line in itertools.islice(f, skiprows):
+					pass
+			else:
+				f.seek(offset)
+			while True:
+				lines = list(itertools.islice(f, self.chunk_size))
+				if len(lines) == 0:
+					return
+				self.__reader_offset = f.tell()
+				yield np.loadtxt([line.decode() for line in lines], delimiter=',', ndmin=2)
+
+	def snapshot(self) -> Recorded_wind_state:
+		'''
+		Returns the position in the recording, to be given to restore
+		'''
+		return Recorded_wind_state(self.__position, self.__buffer, self.__reader_offset, self._speed, self._heading)
+
+	def restore(self, state:Recorded_wind_state):
+		'''
+		Puts the wind back at the position of a snapshot. A file read by chunks is reopened at the offset of the snapshot,
+		unless no chunk was read since then
+		'''
+		self.__position, self.__buffer, reader_offset, self._speed, self._heading = state
+		if self.__reader is not None and reader_offset != self.__reader_offset:
+			self.__reader.close()
+			self.__reader_offset = reader_offset
+			self.__reader = self.__open_reader(reader_offset)
+
+	def copy(self) -> 'Recorded_wind':
+		'''
+		Returns an independent copy of the wind at the same position, with its own reader of a file read by chunks
+		'''
+		wind = copy.copy(self)
+		if self.__reader is not None:
+			wind.__reader = wind.__open_reader(self.__reader_offset)
+		return wind
+
+	@property
+	def heading(self):
+		return np.mod(self._heading, 360)
+
+	@property
+	def speed(self):
+		return self._speed
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
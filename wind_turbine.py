@@ -7,88 +7,217 @@
 """ Environment to simulate a wind turbine """
 # ---------------------------------------------------------------------------
 
+import bisect
+import copy
+import math
 import numpy as np
-from math_utils import wrap_to_m180_p180
-from filters import butter_lowpass, manual_filter
-from scipy.signal import lfilter_zi
-from queue import Queue
+from collections import namedtuple
+from math_utils import wrap_to_m180_p180, make_rng, Prefetched_draws
+from filters import butter_lowpass, lfilter, Streaming_filter
+from spectral_wind import Kaimal_turbulence
+from turbine_models import get_spec
+
+# Compact states used to snapshot and restore the simulation
+Wind_turbine_state = namedtuple('Wind_turbine_state', ['heading', 'control_on', 'power_filter'])
+Wind_state = namedtuple('Wind_state', ['time', 'revolution', 'speed_target', 'heading_target', 'speed', 'heading', 'rng', 'model'], \
+	defaults=(None,))
+
+
+class Power_table:
+	'''
+	Power output of a wind turbine model precomputed on a uniform (wind speed, relative wind angle) grid and read
+	with direct index arithmetic and a bilinear interpolation. It replaces the power curve interpolation, the cosine
+	and the yaw cut off of the exact power computation, for scalars or arrays.
+
+	Interpolation error : the power curve is piecewise linear, it is interpolated exactly when its knots lie on the
+	speed grid. The default speed resolution is the largest step, down to a 1000th of the smallest step of the power
+	curve, of which every knot is a multiple. When there is none, the speed axis is the knots themselves and the
+	speed cell is found with a binary search instead of the index arithmetic.
+	The cosine is interpolated linearly on the angle grid of step h (rad), its error is at most h²/8. The angle
+	resolution is chosen such that the error is at most max_error MW : h = sqrt(8 * max_error / max_power).
+	Beyond the yaw cut off the power is exactly 0, and a NaN wind speed or angle gives NaN as the exact computation.
+	'''
+	__max_speed_divisions = 1000
+	def __init__(self, power_curve, yaw_cut_off:float, max_error:float=1e-6, speed_resolution:float=None):
+		'''
+		Inputs :
+			power_curve 		- [m/s, kW] The wind speeds and the power outputs of the power curve
+			yaw_cut_off 		- [deg] The relative wind angle above which the power is 0
+			max_error 			- [MW] The maximum interpolation error on the angle, 1W by default
+			speed_resolution 	- [m/s] The step of the speed grid, by default a step that has every knot of the power
+								  curve on the grid
+		'''
+		speeds = np.asarray(power_curve[0], dtype=float)
+		powers = np.asarray(power_curve[1], dtype=float)/1e3
+		self.max_error = max_error
+		self.yaw_cut_off = yaw_cut_off
+		self.speed_resolution = self.__knot_resolution(speeds) if speed_resolution is None else speed_resolution
+		self.min_speed = speeds[0]
+		if self.speed_resolution is None:
+			# The knots are the speed axis
+			self.n_speeds = len(speeds) - 1
+			grid_speeds = speeds
+			self.__knots = speeds
+			self.__knot_list = speeds.tolist()
+		else:
+			self.n_speeds = int(np.ceil((speeds[-1] - speeds[0]) / self.speed_resolution))
+			grid_speeds = self.min_speed + self.speed_resolution * np.arange(self.n_speeds + 1)
+			self.__knots = None
+		max_power = max(np.max(powers), max_error)
+		self.n_angles = max(1, int(np.ceil(yaw_cut_off * np.pi/180 / np.sqrt(8 * max_error / max_power))))
+		self.angle_resolution = yaw_cut_off / self.n_angles 	# deg
+
+		grid_angles = self.angle_resolution * np.arange(self.n_angles + 1)
+		self.table = np.maximum(np.cos(grid_angles * np.pi/180)[None, :] \
+			* np.interp(grid_speeds, speeds, powers)[:, None], 0)
+		self.__values = self.table.ravel().tolist()
+
+	@classmethod
+	def __knot_resolution(cls, speeds:np.ndarray) -> float:
+		'''
+		The largest speed step that has every knot on the grid, None if there is none
+		'''
+		min_step = np.min(np.diff(speeds))
+		for n_divisions in range(1, cls.__max_speed_divisions + 1):
+			resolution = min_step / n_divisions
+			grid_knots = (speeds - speeds[0]) / resolution
+			if np.all(np.abs(grid_knots - np.round(grid_knots)) < 1e-6):
+				return resolution
+		return None
+
+	def power(self, wind_speed, rel_wind_angle):
+		'''
+		Inputs :
+			wind_speed 		- [m/s] The wind speed, a scalar or an array
+			rel_wind_angle 	- [deg] The wind heading relative to the wind turbine heading, a scalar or an array
+		Outputs :
+			power_output 	- [MW] The power output before yaw control cost and filtering
+		'''
+		if np.ndim(wind_speed) == 0 and np.ndim(rel_wind_angle) == 0:
+			return self.__scalar_power(float(wind_speed), float(rel_wind_angle))
+		angle = np.abs(rel_wind_angle)
+		# The missing samples are read at a valid cell and set to NaN afterwards
+		invalid = np.isnan(wind_speed) | np.isnan(angle)
+		if np.any(invalid):
+			wind_speed = np.where(invalid, self.min_speed, wind_speed)
+			angle = np.where(invalid, 0, angle)
+		# Cell indices and weights, the speed is clamped to the power curve as in np.interp
+		if self.__knots is None:
+			f_speed = np.clip((wind_speed - self.min_speed) / self.speed_resolution, 0, self.n_speeds)
+			i_speed = np.minimum(f_speed.astype(int), self.n_speeds - 1)
+			w_speed = f_speed - i_speed
+		else:
+			i_speed = np.clip(np.searchsorted(self.__knots, wind_speed, 'right') - 1, 0, self.n_speeds - 1)
+			w_speed = np.clip((wind_speed - self.__knots[i_speed]) / (self.__knots[i_speed + 1] - self.__knots[i_speed]), 0, 1)
+		f_angle = np.minimum(angle, self.yaw_cut_off) / self.angle_resolution
+		i_angle = np.minimum(f_angle.astype(int), self.n_angles - 1)
+		w_angle = f_angle - i_angle
+		# Bilinear interpolation in the flattened table
+		k = i_speed * (self.n_angles + 1) + i_angle
+		t = self.table.ravel()
+		power_output = (1 - w_speed) * ((1 - w_angle) * t[k] + w_angle * t[k + 1]) \
+			+ w_speed * ((1 - w_angle) * t[k + self.n_angles + 1] + w_angle * t[k + self.n_angles + 2])
+		if np.any(invalid):
+			power_output = np.where(invalid, np.nan, power_output)
+		power_output[np.abs(rel_wind_angle) > self.yaw_cut_off] = 0
+		return power_output
+
+	def __scalar_power(self, wind_speed:float, rel_wind_angle:float) -> float:
+		'''
+		Same computation as power() with python floats, which avoids the numpy overhead on scalars
+		'''
+		angle = abs(rel_wind_angle)
+		if angle > self.yaw_cut_off:
+			return 0.0
+		if wind_speed != wind_speed or angle != angle:
+			# A missing sample, NaN as with the exact computation
+			return float('nan')
+		if self.__knots is None:
+			f_speed = min(max((wind_speed - self.min_speed) / self.speed_resolution, 0), self.n_speeds)
+			i_speed = min(int(f_speed), self.n_speeds - 1)
+			w_speed = f_speed - i_speed
+		else:
+			knots = self.__knot_list
+			i_speed = min(max(bisect.bisect_right(knots, wind_speed) - 1, 0), self.n_speeds - 1)
+			w_speed = min(max((wind_speed - knots[i_speed]) / (knots[i_speed + 1] - knots[i_speed]), 0), 1)
+		f_angle = angle / self.angle_resolution
+		i_angle = min(int(f_angle), self.n_angles - 1)
+		w_angle = f_angle - i_angle
+		k = i_speed * (self.n_angles + 1) + i_angle
+		t = self.__values
+		return (1 - w_speed) * ((1 - w_angle) * t[k] + w_angle * t[k + 1]) \
+			+ w_speed * ((1 - w_angle) * t[k + self.n_angles + 1] + w_angle * t[k + self.n_angles + 2])
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
+
+
 
 class Wind_turbine:
-	# Mechanical Data
-	name = 'V80/2000'
-	manufacturer = 'Vestas'
-	rated_power = 2 											# MW
-	rotor_diameter = 80 										# m 
-	nb_blades = 3
-	power_control = 'pitch'
-	min_rotor_speed = 9 										# rd/min
-	max_rotor_speed = 19 										# rd/min
-	cut_in_wind_speed = 3.5 									# m/s
-	cut_off_wind_speed = 25 									# m/s
-	min_hub_height = 60 										# m
-	max_hub_height = 100 										# m
-	# other public details here : https://www.thewindpower.net/turbine_en_30_vestas_v80-2000.php
-
-	# Control data
-	__power_curve = [[0, 0.5, 1., 1.5, 2., 2.5, 3., 3.5, 4., 4.5,  5., 5.5,  6., 6.5,  7., 7.5,  8., 8.5,  9.,  9.5, 10. , 10.5, 11. , 11.5, 12. , 12.5, 13. , 13.5, 14. , 14.5, 15. , 15.5, 16. , 16.5, 17. , 17.5, 18. , 18.5, 19. , 19.5, 20. , 20.5, 21. , 21.5, 22. , 22.5, 23. , 23.5, 24. , 24.5, 25. ], \
-					 [0,   0, 0,    0,  0,   0,  0,  35, 70, 117, 165, 225, 285, 372, 459, 580, 701, 832, 964, 1127, 1289, 1428, 1567, 1678, 1788, 1865, 1941, 1966, 1990, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000, 2000]]
-	__yaw_cut_off = 40 											# deg, the maximum yaw relative to the wind that the structure can handle
-	__yaw_control_step = 1 										# deg
-	__yaw_control_cost = 1e-2 * rated_power 					# MW
+	'''
+	A wind turbine of a model of the registry of turbine_models, the Vestas V80/2000 by default. The specification of
+	the model is shared by all the wind turbines of the model, an instance only holds its state
+	'''
 	__control_on = False
-	__heading_sensor_bias = -3									# deg
 
-	# Dynamics data
-	__rotor_cutoff = 1/60										# Hz
-	__filter_order = 1
-	__b, __a = butter_lowpass(__rotor_cutoff, 1.0, __filter_order)
-	__zi = lfilter_zi(__b, __a)
-	__power_hist_filt = []  									# MW
-	__power_hist = []  											# MW
-
-	def __init__(self, initial_estimated_heading=None, has_inertia=None):
+	def __init__(self, initial_estimated_heading=None, has_inertia=None, power_table=None, rotor_cutoff=None, filter_order=None, \
+		yaw_control_step=None, yaw_control_cost=None, spec=None):
 		''' 
 		Inputs :
 			initial_estimated_heading 		- [deg] The estimated heading = true heading + sensor bias wrt North in degree
 			has_inertia 					- [bool] Determines whether the output power will be filtered
+			power_table 					- [Power_table] If given, e.g. wind_turbine.spec.power_table(), the power is read
+											  from this table instead of being computed exactly
+			rotor_cutoff 					- [Hz] The cutoff frequency of the inertia low-pass filter, the one of the spec
+											  by default
+			filter_order 					- [] The order of the inertia low-pass filter, the one of the spec by default
+			yaw_control_step 				- [deg] The rotation of an action, the one of the spec by default
+			yaw_control_cost 				- [MW] The power cost of an action, the one of the spec by default
+			spec 							- The model, a Turbine_spec or the name of a registered one, V80/2000 by default
 
 		Outputs :
 			power_output 					- [MW]
 		'''
+		self.spec = get_spec(spec)
+		self.__yaw_cut_off = self.spec.yaw_cut_off
+		self.__heading_sensor_bias = self.spec.heading_sensor_bias
 		self._heading = -self.__heading_sensor_bias if initial_estimated_heading is None \
 			else initial_estimated_heading - self.__heading_sensor_bias
 		self._has_inertia = False if has_inertia is None else has_inertia
+		self.__power_table = power_table
+		self.rotor_cutoff = self.spec.rotor_cutoff if rotor_cutoff is None else rotor_cutoff
+		self.filter_order = self.spec.filter_order if filter_order is None else filter_order
+		self.__yaw_control_step = self.spec.yaw_control_step if yaw_control_step is None else yaw_control_step
+		self.__yaw_control_cost = self.spec.yaw_control_cost if yaw_control_cost is None else yaw_control_cost
+		# Each wind turbine has its own filter history, the filter is designed on the first step with inertia
+		self.__power_filter = None
+
+	def __filter(self) -> Streaming_filter:
+		if self.__power_filter is None:
+			self.__power_filter = Streaming_filter(*butter_lowpass(self.rotor_cutoff, 1.0, self.filter_order))
+		return self.__power_filter
 
 	def __power_output(self, wind_speed:float, wind_heading:float) -> float :
 		'''
-		The output power of the wind turbine in MW
+		The output power of the wind turbine in MW. The computation is done on python floats, math.cos and the scalar
+		interpolation of the spec give the same results as np.cos and np.interp without the numpy overhead
 		'''
-		# Linear interpolation of the given power curve to get the power output (output in MW)
-		facing_wind_power_output = np.interp(wind_speed, self.__power_curve[0], self.__power_curve[1])/1e3
-		wraped_wt_heading = wrap_to_m180_p180(self._heading)
-		wraped_wind_heading = wrap_to_m180_p180(wind_heading)
+		wraped_wt_heading = wrap_to_m180_p180(float(self._heading))
+		wraped_wind_heading = wrap_to_m180_p180(float(wind_heading))
 		rel_wind_angle = wraped_wind_heading - wraped_wt_heading
 		# Get power output without filtering
-		if np.abs(rel_wind_angle) > self.__yaw_cut_off:
-			power_output = 0
+		if self.__power_table is not None:
+			power_output = self.__power_table.power(wind_speed, rel_wind_angle)
+		elif abs(rel_wind_angle) > self.__yaw_cut_off:
+			power_output = 0.0
 		else:
-			power_output = np.max([np.cos(rel_wind_angle * np.pi/180) * facing_wind_power_output, 0])
+			# Linear interpolation of the given power curve to get the power output (output in MW)
+			facing_wind_power_output = self.spec.scalar_facing_power(float(wind_speed))
+			power_output = max(math.cos(rel_wind_angle * math.pi/180) * facing_wind_power_output, 0.0)
 
 		# If filtering is enabled, process to low-pass filter
 		if self._has_inertia:
-			# Initialize the filter
-			if len(self.__power_hist_filt) <= self.__filter_order:
-				self.__power_hist.append(power_output)
-				self.__power_hist_filt = len(self.__power_hist) * [np.mean(self.__power_hist)]
-			# Filter
-			else:
-				self.__power_hist.pop(0)
-				self.__power_hist.append(power_output)
-				power_hist_filt = manual_filter(self.__b, self.__a, \
-					self.__power_hist, self.__power_hist_filt[1:])
-				self.__power_hist_filt.pop(0)
-				self.__power_hist_filt.append(power_hist_filt[-1])
-			return self.__power_hist_filt[-1]
+			return self.__filter().update_scalar(power_output)
 		else:
 			return power_output
 
@@ -124,12 +253,284 @@ class Wind_turbine:
 			power_output -= self.__yaw_control_cost
 		return power_output
 
+	def idle_steps(self, wind_speeds:np.ndarray, wind_headings:np.ndarray) -> np.ndarray:
+		'''
+		Runs successive steps with the 'do nothing' action in one vectorized pass. The heading does not change, so the
+		power outputs are the same as the ones of calling step(wind_speed, wind_heading, 1) on each wind
+		Inputs :
+			wind_speeds 	- [m/s] The wind speed of each step, an array
+			wind_headings 	- [deg] The wind heading wrt North of each step, an array
+		Outputs :
+			power_output 	- [MW] An array with the power output of each step
+		'''
+		self.__control_on = False
+		wraped_wt_heading = wrap_to_m180_p180(self._heading)
+		rel_wind_angle = wrap_to_m180_p180(np.asarray(wind_headings, dtype=float)) - wraped_wt_heading
+		if self.__power_table is not None:
+			power_output = self.__power_table.power(np.asarray(wind_speeds, dtype=float), rel_wind_angle)
+		else:
+			facing_wind_power_output = self.spec.facing_power(wind_speeds)
+			power_output = np.where(np.abs(rel_wind_angle) > self.__yaw_cut_off, 0.0, \
+				np.maximum(np.cos(rel_wind_angle * np.pi/180) * facing_wind_power_output, 0))
+		if self._has_inertia:
+			return self.__filter().update_block(power_output[:, None])[:, 0]
+		return power_output
+
+	@staticmethod
+	def power_table(max_error:float=1e-6) -> Power_table:
+		'''
+		The power table of the default model for a given maximum error in MW, see Turbine_spec.power_table for the
+		other models
+		'''
+		return get_spec().power_table(max_error)
+
+	def snapshot(self) -> 'Wind_turbine_state':
+		'''
+		Returns the state of the wind turbine, to be given to restore
+		'''
+		filter_state = None if self.__power_filter is None else self.__power_filter.snapshot()
+		return Wind_turbine_state(self._heading, self.__control_on, filter_state)
+
+	def restore(self, state:'Wind_turbine_state'):
+		'''
+		Puts the wind turbine back in the state of a snapshot
+		'''
+		self._heading = state.heading
+		self.__control_on = state.control_on
+		if state.power_filter is None:
+			self.__power_filter = None
+		else:
+			self.__filter().restore(state.power_filter)
+
+	def copy(self) -> 'Wind_turbine':
+		'''
+		Returns an independent copy of the wind turbine, in the same state
+		'''
+		wind_turbine = copy.copy(self)
+		wind_turbine.__power_filter = None if self.__power_filter is None else self.__power_filter.copy()
+		return wind_turbine
+
 	@property
 	def heading(self): 	# corresponds to the estimated heading
-		return np.mod(self._heading + self.__heading_sensor_bias, 360)
+		return (self._heading + self.__heading_sensor_bias) % 360
 
 	@property
 	def true_heading(self): 	# corresponds to the true heading
+		return self._heading % 360
+
+	@property
+	def yaw_cut_off(self): 	# deg
+		return self.__yaw_cut_off
+
+	@property
+	def yaw_control_cost(self): 	# MW
+		return self.__yaw_control_cost
+
+	@property
+	def yaw_control_step(self): 	# deg
+		return self.__yaw_control_step
+
+	@property
+	def name(self):
+		return self.spec.name
+
+	@property
+	def rated_power(self): 	# MW
+		return self.spec.rated_power
+
+	@property
+	def rotor_diameter(self): 	# m
+		return self.spec.rotor_diameter
+
+	def __str__(self):
+		return str(self.__class__) + ": " + str(self.__dict__)
+
+
+class Wind_turbine_batch:
+	'''
+	A group of N wind turbines stepped together with array operations. Each turbine behaves as an independent
+	Wind_turbine instance : given the same inputs, the power outputs are identical to the ones of N separate
+	Wind_turbine objects. The turbines may be of different models, the power curves are then interpolated per model
+	and the filters are grouped by dynamics, the specs themselves are shared and not copied per turbine
+	'''
+	def __init__(self, n_turbines, initial_estimated_headings=None, has_inertia=None, power_table=None, rotor_cutoff=None, \
+		filter_order=None, yaw_control_step=None, yaw_control_cost=None, specs=None):
+		'''
+		Inputs :
+			n_turbines 					- [] The number of wind turbines N
+			initial_estimated_headings 	- [deg] The estimated headings, a scalar or an array of size N
+			has_inertia 				- [bool] Determines whether the output power will be filtered, a scalar
+										  or an array of size N
+			power_table 				- [Power_table] If given, e.g. spec.power_table(), the power is read from this
+										  table instead of being computed exactly. Only for wind turbines of a single model
+			rotor_cutoff 				- [Hz] The cutoff frequency of the inertia low-pass filter, the one of the specs
+										  by default
+			filter_order 				- [] The order of the inertia low-pass filter, the one of the specs by default
+			yaw_control_step 			- [deg] The rotation of an action, the one of the specs by default
+			yaw_control_cost 			- [MW] The power cost of an action, the one of the specs by default
+			specs 						- The models, a Turbine_spec or the name of a registered one for all the wind
+										  turbines, or a list of size N of them. V80/2000 by default
+
+		Outputs :
+			power_output 				- [MW] An array of size N
+		'''
+		self.n_turbines = n_turbines
+		self.specs = [get_spec(spec) for spec in (specs if isinstance(specs, (list, tuple)) else [specs] * n_turbines)]
+		if len(self.specs) != n_turbines:
+			raise ValueError('One spec per wind turbine is needed, got ' + str(len(self.specs)) + ' for ' + str(n_turbines))
+		# Indices of the wind turbines of each model
+		self.__models = {}
+		for i, spec in enumerate(self.specs):
+			self.__models.setdefault(spec, []).append(i)
+		self.__models = {spec: np.array(indices) for spec, indices in self.__models.items()}
+		if power_table is not None and len(self.__models) > 1:
+			raise ValueError('A power table is for a single model, the wind turbines have ' + str(len(self.__models)))
+
+		self.__yaw_cut_off = self.__per_turbine('yaw_cut_off') 					# deg
+		self.__heading_sensor_bias = self.__per_turbine('heading_sensor_bias') 	# deg
+		initial_estimated_headings = 0 if initial_estimated_headings is None else initial_estimated_headings
+		self.__initial_heading = np.broadcast_to(np.asarray(initial_estimated_headings, dtype=float) \
+			- self.__heading_sensor_bias, (n_turbines,)).copy()
+		self._heading = self.__initial_heading.copy()
+		has_inertia = False if has_inertia is None else has_inertia
+		self._has_inertia = np.broadcast_to(np.asarray(has_inertia, dtype=bool), (n_turbines,)).copy()
+		self.__control_on = np.zeros(n_turbines, dtype=bool)
+		self.__power_table = power_table
+		self.rotor_cutoff = self.__per_turbine('rotor_cutoff') if rotor_cutoff is None else rotor_cutoff
+		self.filter_order = self.__per_turbine('filter_order') if filter_order is None else filter_order
+		self.__yaw_control_step = self.__per_turbine('yaw_control_step') if yaw_control_step is None else yaw_control_step
+		self.__yaw_control_cost = self.__per_turbine('yaw_control_cost') if yaw_control_cost is None else yaw_control_cost
+		# Indices of the wind turbines of each (rotor cutoff, filter order), a bank of filters per group all updated in
+		# a single array operation. The filters are designed on the first step with inertia
+		self.__filter_groups = {}
+		dynamics = zip(np.broadcast_to(self.rotor_cutoff, (n_turbines,)).tolist(), \
+			np.broadcast_to(self.filter_order, (n_turbines,)).tolist())
+		for i, key in enumerate(dynamics):
+			self.__filter_groups.setdefault(key, []).append(i)
+		self.__filter_groups = [(key, np.array(indices)) for key, indices in self.__filter_groups.items()]
+		self.__power_filters = None
+
+	def __per_turbine(self, field:str):
+		'''
+		A field of the specs, a scalar when the wind turbines have a single model and an array of size N otherwise
+		'''
+		if len(self.__models) == 1:
+			return getattr(self.specs[0], field)
+		return np.array([getattr(spec, field) for spec in self.specs])
+
+	def __filters(self) -> list:
+		if self.__power_filters is None:
+			self.__power_filters = [Streaming_filter(*butter_lowpass(cutoff, 1.0, order), len(indices)) \
+				for (cutoff, order), indices in self.__filter_groups]
+		return self.__power_filters
+
+	def __filter(self, power_output:np.ndarray) -> np.ndarray:
+		filters = self.__filters()
+		if len(filters) == 1:
+			return filters[0].update(power_output)
+		filtered = np.zeros(self.n_turbines)
+		for power_filter, (_, indices) in zip(filters, self.__filter_groups):
+			filtered[indices] = power_filter.update(power_output[indices])
+		return filtered
+
+	def __facing_power(self, wind_speeds:np.ndarray) -> np.ndarray:
+		'''
+		The power output facing the wind in MW, the power curve of each model is interpolated once for its turbines
+		'''
+		if len(self.__models) == 1:
+			return self.specs[0].facing_power(wind_speeds)
+		facing_wind_power_output = np.zeros(self.n_turbines)
+		for spec, indices in self.__models.items():
+			facing_wind_power_output[indices] = spec.facing_power(wind_speeds[indices])
+		return facing_wind_power_output
+
+	def __power_output(self, wind_speeds:np.ndarray, wind_headings:np.ndarray) -> np.ndarray :
+		'''
+		The output power of the wind turbines in MW
+		'''
+		wraped_wt_heading = wrap_to_m180_p180(self._heading)
+		wraped_wind_heading = wrap_to_m180_p180(wind_headings)
+		rel_wind_angle = wraped_wind_heading - wraped_wt_heading
+		# Get power output without filtering
+		if self.__power_table is not None:
+			power_output = self.__power_table.power(wind_speeds, rel_wind_angle)
+		else:
+			# Linear interpolation of the given power curve to get the power output (output in MW)
+			facing_wind_power_output = self.__facing_power(wind_speeds)
+			power_output = np.where(np.abs(rel_wind_angle) > self.__yaw_cut_off, 0.0, \
+				np.maximum(np.cos(rel_wind_angle * np.pi/180) * facing_wind_power_output, 0))
+
+		# If filtering is enabled, process to low-pass filter
+		if np.any(self._has_inertia):
+			power_output = np.where(self._has_inertia, self.__filter(power_output), power_output)
+		return power_output
+
+	def __rotate(self, directions):
+		valid = (directions == -1) | (directions == 0) | (directions == +1)
+		for direction in directions[~valid]:
+			print('wind turbine command ', direction, ' not valid')
+		# -1 rotates trigo, +1 rotates clockwise and 0 stays in place
+		self.__control_on = (directions == -1) | (directions == +1)
+		self._heading = np.where(self.__control_on, self._heading + directions * self.__yaw_control_step, \
+			self._heading)
+
+	def step(self, wind_speeds:np.ndarray, wind_headings:np.ndarray, actions:np.ndarray) -> np.ndarray:
+		'''
+		Takes an action per wind turbine and then returns the output powers
+		Inputs :
+			wind_speeds 	- [m/s] The wind speed at each wind turbine, a scalar or an array of size N
+			wind_headings 	- [deg] The wind heading wrt North in degree, a scalar or an array of size N
+			actions 		- {0, 1, 2}, 0 is rotate trigo, 1 is 'do nothing', 2 is rotate clockwise, array of size N
+		Outputs :
+			power_output 	- [MW] An array of size N
+		'''
+		directions = np.broadcast_to(np.asarray(actions), (self.n_turbines,)) - 1
+		self.__rotate(directions)
+		power_output = self.__power_output(np.broadcast_to(wind_speeds, (self.n_turbines,)), \
+			np.broadcast_to(wind_headings, (self.n_turbines,)))
+		return np.where(self.__control_on, power_output - self.__yaw_control_cost, power_output)
+
+	def reset(self, mask=None):
+		'''
+		Puts the wind turbines selected by mask back to their initial heading and restarts their filters
+		Input : mask - [bool] An array of size N, all the wind turbines are reset by default
+		'''
+		mask = np.ones(self.n_turbines, dtype=bool) if mask is None else np.asarray(mask)
+		self._heading[mask] = self.__initial_heading[mask]
+		self.__control_on[mask] = False
+		if self.__power_filters is not None:
+			for power_filter, (_, indices) in zip(self.__power_filters, self.__filter_groups):
+				power_filter.reset(mask[indices])
+
+	def snapshot(self) -> 'Wind_turbine_state':
+		'''
+		Returns the state of the wind turbines, to be given to restore
+		'''
+		filter_state = None if self.__power_filters is None else [power_filter.snapshot() for power_filter in self.__power_filters]
+		return Wind_turbine_state(self._heading.copy(), self.__control_on.copy(), filter_state)
+
+	def restore(self, state:'Wind_turbine_state'):
+		'''
+		Puts the wind turbines back in the state of a snapshot
+		'''
+		self._heading = state.heading.copy()
+		self.__control_on = state.control_on.copy()
+		if state.power_filter is None:
+			self.__power_filters = None
+		else:
+			for power_filter, filter_state in zip(self.__filters(), state.power_filter):
+				power_filter.restore(filter_state)
+
+	@property
+	def heading(self): 	# corresponds to the estimated headings
+		return np.mod(self._heading + self.__heading_sensor_bias, 360)
+
+	@property
+	def rated_power(self): 	# MW, an array of size N
+		return np.array([spec.rated_power for spec in self.specs], dtype=float)
+
+	@property
+	def true_heading(self): 	# corresponds to the true headings
 		return np.mod(self._heading, 360)
 
 	def __str__(self):
@@ -141,6 +542,9 @@ class Wind_turbine:
 # variation of the wind and the heading due to diurnal cycles
 class Wind:
 	model = 'OU' 					# model used for wind simulation
+	# Models of the short term variations by model_type : the OU recursion is built in, the spectral models
+	# synthesize the turbulence by chunks and are given the initial speed and the model_options
+	models = {'OU': None, 'Kaimal': Kaimal_turbulence}
 	__c_speed_factor = 0.2 			# variable used in the OU model
 	__speed_noise = 0.1 			# variable used in the OU model
 	__c_heading_factor = 0.005 		# variable used in the OU model
@@ -153,18 +557,29 @@ class Wind:
 	__revolution = 0 				# represents the number of revolutions
 	__unwrap_threshold = 180 		# deg, is the threshold used to unwrap the wind angle
 	__dt = 1 						# s, represents the time step
+	__weights = {} 					# closed form weights of the OU substeps, shared by all instances
 
-	def __init__(self, initial_speed=None, initial_heading=None, step_duration=None, model_type='OU'):
+	def __init__(self, initial_speed=None, initial_heading=None, step_duration=None, model_type='OU', rng=None, coarse_step=False, \
+		c_speed_factor=None, speed_noise=None, c_heading_factor=None, heading_noise=None, model_options=None):
 		''' 
 		Inputs :
 			heading 		- [deg] The wind angle wrt Northin degree
 			speed 			- [m/s] A negative speed would result in a 180° shift in heading
 			step_duration 	- [s] 	The duration of a time step. It should be higher or equal to 1s
 			time_of_the_day - [s]	For instance 7H30AM is 7*3600 + 30*60. By default it is set to midnight
-			model_type		- [] 	The model used to simulate the wind, the 'OU'
+			model_type		- [] 	The model used to simulate the wind, a key of models. The 'OU'
 									model is the one selected by default and corresponds to the 
-									Ornstein-Uhlenbeck model. It could be better represented by the Kailman,
-									or the Mann model as described here : https://wes.copernicus.org/preprints/wes-2021-51/wes-2021-51.pdf 
+									Ornstein-Uhlenbeck model. 'Kaimal' is the spectral model of IEC 61400-1, see
+									Kaimal_turbulence, closer to measured gusts as described here : https://wes.copernicus.org/preprints/wes-2021-51/wes-2021-51.pdf 
+			rng 			- [] 	The random generator of the noise, a numpy Generator or RandomState, or the seed of
+									a new Generator. By default the global numpy random state is used. The noise
+									is drawn by blocks, so the generator should not be shared with other draws
+			coarse_step 	- [bool] If True, each step jumps the OU process forward by step_duration seconds with
+									a single draw per step from the closed form distribution of the substeps. The wind
+									has the same distribution as with the substep loop, at a constant cost per step
+			c_speed_factor, speed_noise, c_heading_factor, heading_noise
+							- [] 	The constants of the OU model, the ones of the class by default
+			model_options 	- [] 	The arguments of a spectral model, e.g. {'turbulence_intensity': 0.16}
 		Outputs :
 			heading 		- [deg]
 			speed 			- [m/s]
@@ -173,88 +588,317 @@ class Wind:
 		self._heading = 0 if initial_heading is None else initial_heading
 		self.step_duration = self.__dt if step_duration is None else step_duration
 		self.model_type = model_type
+		self.model = model_type
+		self.__noise = Prefetched_draws(make_rng(rng), 'standard_normal')
+		model_class = self.models.get(model_type)
+		self.__turbulence = None if model_class is None \
+			else model_class(self._speed, sample_period=self.__dt, **({} if model_options is None else model_options))
+		self.coarse_step = coarse_step
+		self.__c_speed_factor = self.__c_speed_factor if c_speed_factor is None else c_speed_factor
+		self.__speed_noise = self.__speed_noise if speed_noise is None else speed_noise
+		self.__c_heading_factor = self.__c_heading_factor if c_heading_factor is None else c_heading_factor
+		self.__heading_noise = self.__heading_noise if heading_noise is None else heading_noise
 
 		# Initialise hidden variables. The heading and speed target corresponds to the
 		# average on which the OU process must tend. They vary slowly whereas the OU
 		# process accounts for fast variations such as gusts
 		self.__speed_init = self._speed
 		self.__heading_init = self._heading
+		self.__speed_target = self.__speed_init
 		self.__heading_target = self.__heading_init
 
-	def step(self):
-		'''
-		step_duration must be an int
-		'''
-		# Increment time and compute long term speed and heading duration
-		self.__time += self.step_duration
-		self.__diurnal_cycle()
-
-		# Compute short term variations
-		if self.model == 'OU':
-			mean_sp = self._speed
-			mean_hd = self._heading
-			steps = 1
-			for i in range(int(np.ceil(self.step_duration))):
-				# Compute fast chaning wind at 1/dt frequency, typically 1Hz
-				self.__ou()
-				steps += 1
-				mean_sp += (self._speed - mean_sp)/steps
-				mean_hd += (self._heading - mean_hd)/steps
-				if i % self.step_duration == 1:
-					# Flush new value
-					self._speed = mean_sp
-					self._heading = mean_hd
-					# Reset incremental mean
-					mean_sp = self._speed
-					mean_hd = self._heading
-					steps = 1
-		else:
+	def step(self, step_duration=None):
+		'''
+		Input : step_duration - [s] The duration of this step, step_duration by default. It allows variable steps
+		'''
+		if self.model not in self.models:
+			print('Wind model not found in class ', str(self.__class__))
+			return
+		step_duration = self.step_duration if step_duration is None else step_duration
+
+		# Increment time and compute long term speed and heading
+		self.__time += step_duration
+		speed_target, heading_target = self.__diurnal_cycle(self.__time)
+
+		if self.__turbulence is not None:
+			# Turbulence of a spectral model, averaged over the samples of the step
+			speed_deviation, heading_deviation = self.__turbulence.sample_step(max(1, math.ceil(step_duration / self.__dt)), \
+				self.__noise)
+			self._speed = speed_target * (1 + speed_deviation)
+			self._heading = heading_target + heading_deviation
+			return
+
+		# Compute short term variations, the noise is drawn in the order speed then heading for each substep
+		n_substeps = 1 if self.coarse_step else math.ceil(step_duration)
+		if n_substeps == 1:
+			speed_noise, heading_noise = self.__noise.take(2).tolist()
+			self._speed = self.__ou_step(self._speed, speed_target, self.__c_speed_factor, \
+				self.__speed_noise * abs(speed_target), speed_noise, step_duration)
+			self._heading = self.__ou_step(self._heading, heading_target, self.__c_heading_factor, \
+				self.__heading_noise, heading_noise, step_duration)
+			return
+		noise = self.__noise.take(2 * n_substeps).reshape(n_substeps, 2)
+		self._speed = self.__ou(self._speed, speed_target, self.__c_speed_factor, \
+			self.__speed_noise * np.abs(speed_target), noise[:, 0], step_duration)
+		self._heading = self.__ou(self._heading, heading_target, self.__c_heading_factor, \
+			self.__heading_noise, noise[:, 1], step_duration)
+
+	def generate(self, n_steps:int):
+		'''
+		Runs n_steps steps in one vectorized pass. The wind is the same as the one obtained by calling
+		step() n_steps times, and the wind instance is left in the state of the last step
+		Inputs :
+			n_steps 	- [] The number of steps to generate
+		Outputs :
+			speed 		- [m/s] Array of size n_steps with the wind speed after each step
+			heading 	- [deg] Array of size n_steps with the wind heading after each step
+		'''
+		if self.model not in self.models:
 			print('Wind model not found in class ', str(self.__class__))
+			return np.full(n_steps, self.speed), np.full(n_steps, self.heading)
+
+		# Increment time and compute long term speed and heading of every step
+		time = np.cumsum(np.concatenate(([self.__time], np.full(n_steps, self.step_duration))))[1:]
+		speed_target, heading_target = self.__diurnal_cycle(time)
+		self.__time = time[-1]
+
+		if self.__turbulence is not None:
+			speed_deviation, heading_deviation = self.__turbulence.sample(n_steps, \
+				max(1, math.ceil(self.step_duration / self.__dt)), self.__noise)
+			speed = speed_target * (1 + speed_deviation)
+			heading = heading_target + heading_deviation
+			self._speed = float(speed[-1])
+			self._heading = float(heading[-1])
+			return np.abs(speed), np.where(speed < 0, np.mod(heading + 180, 360), np.mod(heading, 360))
+
+		# Compute short term variations. The noise of the whole run is drawn as one block, in the
+		# same order as step by step draws
+		n_substeps = 1 if self.coarse_step else int(np.ceil(self.step_duration))
+		noise = self.__noise.take(2 * n_steps * n_substeps).reshape(n_steps, n_substeps, 2)
+		speed = self.__ou(self._speed, speed_target, self.__c_speed_factor, \
+			self.__speed_noise * np.abs(speed_target), noise[:, :, 0], self.step_duration)
+		heading = self.__ou(self._heading, heading_target, self.__c_heading_factor, \
+			self.__heading_noise, noise[:, :, 1], self.step_duration)
+		self._speed = float(speed[-1])
+		self._heading = float(heading[-1])
+
+		# Same negative speed heading flip as the speed and heading properties
+		return np.abs(speed), np.where(speed < 0, np.mod(heading + 180, 360), np.mod(heading, 360))
+
+	def forecast(self, n_steps:int, n_members:int, rng=None):
+		'''
+		Samples an ensemble of possible futures of the wind from its current state, e.g. for model predictive control.
+		The members follow the OU dynamics of the wind, each step jumping forward with the closed form of the substeps
+		as with coarse_step, and draw their noise from rng, so the wind itself is not changed
+		Inputs :
+			n_steps 	- [] The number of steps of each member
+			n_members 	- [] The number of members of the ensemble
+			rng 		- The random generator of the members, see make_rng
+		Outputs :
+			speed 		- [m/s] Array of size n_members x n_steps with the wind speed after each step
+			heading 	- [deg] Array of size n_members x n_steps with the wind heading after each step
+		'''
+		# Targets of the next steps, the state of the diurnal cycle is kept
+		time = self.__time + self.step_duration * np.arange(1, n_steps + 1)
+		diurnal_state = (self.__speed_target, self.__heading_target, self.__revolution)
+		speed_target, heading_target = self.__diurnal_cycle(time)
+		self.__speed_target, self.__heading_target, self.__revolution = diurnal_state
 
-	def __ou(self):
+		n_substeps = max(1, math.ceil(self.step_duration))
+		a_speed, sum_speed, norm_speed = self.__substep_weights(self.__c_speed_factor, n_substeps)
+		a_heading, sum_heading, norm_heading = self.__substep_weights(self.__c_heading_factor, n_substeps)
+		noise = make_rng(rng).standard_normal((2, n_steps, n_members))
+		speed = np.zeros((n_steps, n_members))
+		heading = np.zeros((n_steps, n_members))
+		value_speed = np.full(n_members, float(self._speed))
+		value_heading = np.full(n_members, float(self._heading))
+		for k in range(n_steps):
+			value_speed = a_speed * value_speed + self.__c_speed_factor * speed_target[k] * sum_speed \
+				+ self.__speed_noise * abs(speed_target[k]) * norm_speed * noise[0, k]
+			value_heading = a_heading * value_heading + self.__c_heading_factor * heading_target[k] * sum_heading \
+				+ self.__heading_noise * norm_heading * noise[1, k]
+			speed[k], heading[k] = value_speed, value_heading
+		return np.abs(speed.T), np.where(speed.T < 0, np.mod(heading.T + 180, 360), np.mod(heading.T, 360))
+
+	def __ou(self, value:float, target:np.ndarray, c_factor:float, noise_std, noise:np.ndarray, step_duration:float) -> np.ndarray:
 		'''
 		This is the Ornstein-Uhlenbeck process, a stationary Gauss-Markov model,
 		a math definition is available at page 7 here : https://www.merl.com/publications/docs/TR2022-102.pdf
+		The random distribution variance is chosen such that wind gust can reach 40% of the average wind. Support for random walk and normal distribution
+		is available here : https://en.wikipedia.org/wiki/Random_walk#:~:text=A%20random%20walk%20having%20a,walk%20as%20an%20underlying%20assumption
+
+		The fast changing wind is computed at 1/dt frequency, typically 1Hz, and is averaged after the two first
+		substeps of each step. Each step is then an affine map of the previous value, so that the whole
+		run is an AR(1) recursion computed as a linear filter
+		Inputs :
+			value 		- The value before the first step
+			target 		- The long term target of each step, a scalar or an array of size n_steps
+			c_factor 	- The OU mean reversion factor
+			noise_std 	- The noise standard deviation of each step, a scalar or an array of size n_steps
+			noise 		- Standard normal draws of size n_substeps or n_steps x n_substeps, with a single
+						  substep if coarse_step is True
+			step_duration 	- [s] The duration of the steps
+		Outputs :
+			value 		- The value after each step, a scalar or an array of size n_steps
 		'''
-		c_speed = self.__c_speed_factor * self.__speed_target
-		# The random distribution variance is chosen such that wind gust can reach 40% of the average wind. Support for random walk and normal distribution
-		# is available here : https://en.wikipedia.org/wiki/Random_walk#:~:text=A%20random%20walk%20having%20a,walk%20as%20an%20underlying%20assumption
-		self._speed = c_speed + (1 - self.__c_speed_factor) * self._speed + np.random.normal(0.0, self.__speed_noise * np.abs(self.__speed_target))
+		n_substeps = int(np.ceil(step_duration))
+		if n_substeps == 0:
+			return np.full(np.shape(target), value)[()]
+		r = 1 - c_factor
+		if self.coarse_step:
+			a, weight_sum, weight_norm = self.__substep_weights(c_factor, n_substeps)
+			b = c_factor * target * weight_sum + noise_std * weight_norm * noise[..., 0]
+		elif n_substeps == 1:
+			a, b = r, c_factor * target + noise_std * noise[..., 0]
+		else:
+			if noise.ndim > 1:
+				target = target[:, None]
+				noise_std = np.reshape(noise_std, (-1, 1))
+			u = c_factor * target + noise_std * noise
+			# Substeps recursion from a zero value, the contribution of the initial value is added below
+			z = lfilter([1.], [1., -r], u, axis=-1)
+			# Incremental mean flushed after the two first substeps, then OU recursion for the remaining ones
+			r_end = r**(n_substeps - 2)
+			a = r_end * (1 + r + r*r) / 3
+			b = r_end * (z[..., 0] + z[..., 1]) / 3 + (z[..., -1] - r_end * z[..., 1])
+		if np.ndim(b) == 0:
+			return b + a * value
+		return lfilter([1.], [1., -a], b, zi=[a * value])[0]
 
-		c_heading = self.__c_heading_factor * self.__heading_target
-		self._heading = c_heading + (1 - self.__c_heading_factor) * self._heading + np.random.normal(0.0, self.__heading_noise)
+	def __ou_step(self, value:float, target:float, c_factor:float, noise_std:float, noise:float, step_duration:float) -> float:
+		'''
+		Same as __ou for one step with a single draw, i.e. one substep or a coarse step, with python floats. The
+		operations are the ones of __ou, so the value is the same without the numpy overhead
+		'''
+		if self.coarse_step:
+			n_substeps = math.ceil(step_duration)
+			if n_substeps == 0:
+				return value
+			a, weight_sum, weight_norm = self.__substep_weights(c_factor, n_substeps)
+			return c_factor * target * weight_sum + noise_std * weight_norm * noise + a * value
+		return c_factor * target + noise_std * noise + (1 - c_factor) * value
 
-	def __diurnal_cycle(self):
+	def __substep_weights(self, c_factor:float, n_substeps:int):
+		'''
+		Closed form of the substep loop of __ou. The value after a step is a * value + sum_i w_i * u_i, where
+		u_i = c_factor * target + noise_std * e_i is the input of substep i and e_i are independent standard normal
+		draws. So given the value before the step it is gaussian, with mean a * value + c_factor * target * sum_i w_i
+		and standard deviation noise_std * sqrt(sum_i w_i²), and a single draw per step has the exact distribution
+		Outputs :
+			a 				- The factor of the value before the step
+			weight_sum 		- sum_i w_i
+			weight_norm 	- sqrt(sum_i w_i²)
+		'''
+		if (c_factor, n_substeps) not in self.__weights:
+			r = 1 - c_factor
+			if n_substeps == 1:
+				a, w = r, np.ones(1)
+			else:
+				r_end = r**(n_substeps - 2)
+				a = r_end * (1 + r + r*r) / 3
+				w = np.concatenate(([r_end * (1 + r) / 3, r_end / 3], r**np.arange(n_substeps - 3, -1, -1)))
+			self.__weights[(c_factor, n_substeps)] = (float(a), float(np.sum(w)), float(np.sqrt(np.sum(w*w))))
+		return self.__weights[(c_factor, n_substeps)]
+
+	def __diurnal_cycle(self, time:np.ndarray):
 		'''
 		The diurnal cycles is modelised as an elliptic day-night shift of the wind : https://en.wikipedia.org/wiki/Ellipse 
+		Inputs :
+			time 			- [s] The time of each step, a scalar or an array
+		Outputs :
+			speed_target 	- [m/s] The speed target of each step
+			heading_target 	- [deg] The unwrapped heading target of each step
 		'''
-		u = np.tan((2 * np.pi * self.__time / self.__diurnal_period) / 2)
-		x = (1 - u**2)/(1 + u**2)
-		y = self.__diurnal_factor * (2*u) / (1 + u**2)
-		self.__speed_target = np.sqrt(x**2 + y**2) * self.__speed_init
+		if not isinstance(time, np.ndarray):
+			return self.__scalar_diurnal_cycle(time)
+		u = np.tan((2 * np.pi * time / self.__diurnal_period) / 2)
+		x = (1 - u*u)/(1 + u*u)
+		y = self.__diurnal_factor * (2*u) / (1 + u*u)
+		speed_target = np.sqrt(x*x + y*y) * self.__speed_init
 		# unwrap heading target
 		prev_heading_target = self.__heading_target - self.__revolution * 360
 		heading_target = np.arctan2(y, x) * 180/np.pi + self.__heading_init
-		self.__heading_target = self.__unwrap_360(prev_heading_target, heading_target)
+		heading_target = self.__unwrap_360(prev_heading_target, heading_target)
 
-	def __unwrap_360(self, prev_value:float, value:float) -> float:
+		self.__speed_target = speed_target if np.ndim(speed_target) == 0 else speed_target[-1]
+		self.__heading_target = heading_target if np.ndim(heading_target) == 0 else heading_target[-1]
+		return speed_target, heading_target
+
+	def __scalar_diurnal_cycle(self, time:float):
+		'''
+		Same as __diurnal_cycle for a single time with python floats. np.tan and np.arctan2 are kept because the math
+		module does not give the same results, math.sqrt does
+		'''
+		u = float(np.tan((2 * np.pi * time / self.__diurnal_period) / 2))
+		x = (1 - u*u)/(1 + u*u)
+		y = self.__diurnal_factor * (2*u) / (1 + u*u)
+		speed_target = math.sqrt(x*x + y*y) * self.__speed_init
+		prev_heading_target = self.__heading_target - self.__revolution * 360
+		heading_target = float(np.arctan2(y, x)) * 180/np.pi + self.__heading_init
+		heading_target = self.__unwrap_360(prev_heading_target, heading_target)
+		self.__speed_target = speed_target
+		self.__heading_target = heading_target
+		return speed_target, heading_target
+
+	def __unwrap_360(self, prev_value:float, value):
 		"""
-		Unwrap the value to the previous value. This is used to avoid discontinuities in the wind angle
+		Unwrap the value to the previous value. This is used to avoid discontinuities in the wind angle.
+		The value can also be an array of successive values
 		"""
-		if np.abs(value - prev_value) > self.__unwrap_threshold:
-			self.__revolution -= np.sign(value - prev_value)
-		return value + self.__revolution * 360
+		if not isinstance(value, np.ndarray):
+			if abs(value - prev_value) > self.__unwrap_threshold:
+				self.__revolution -= 1 if value > prev_value else -1
+			return value + self.__revolution * 360
+		jumps = np.diff(value, prepend=prev_value)
+		revolution = self.__revolution - np.cumsum(np.where(np.abs(jumps) > self.__unwrap_threshold, np.sign(jumps), 0))
+		self.__revolution = revolution[-1]
+		return value + revolution * 360
 		
+	def snapshot(self) -> 'Wind_state':
+		'''
+		Returns the state of the wind, random generator and prefetched noise included, to be given to restore
+		'''
+		return Wind_state(self.__time, self.__revolution, self.__speed_target, self.__heading_target, \
+			self._speed, self._heading, self.__noise.get_state(), \
+			None if self.__turbulence is None else self.__turbulence.snapshot())
+
+	def restore(self, state:'Wind_state'):
+		'''
+		Puts the wind back in the state of a snapshot, the following steps draw the same noise as after the snapshot
+		'''
+		self.__time, self.__revolution, self.__speed_target, self.__heading_target, \
+			self._speed, self._heading, noise_state, turbulence_state = state
+		self.__noise.set_state(noise_state)
+		if turbulence_state is not None:
+			self.__turbulence.restore(turbulence_state)
+
+	def copy(self) -> 'Wind':
+		'''
+		Returns an independent copy of the wind, in the same state and with a copy of its random generator
+		'''
+		wind = copy.copy(self)
+		wind.__noise = self.__noise.copy()
+		wind.__turbulence = copy.copy(self.__turbulence)
+		return wind
+
+	@property
+	def speed_deviation(self): 	# m/s, short term deviation of the wind speed from its diurnal target
+		return self._speed - self.__speed_target
+
+	@property
+	def heading_deviation(self): 	# deg, short term deviation of the wind heading from its diurnal target
+		return self._heading - self.__heading_target
+
 	@property
 	def heading(self):
 		if self._speed < 0:
-			return np.mod(self._heading + 180, 360)
+			return (self._heading + 180) % 360
 		else:
-			return np.mod(self._heading, 360)
+			return self._heading % 360
 
 	@property
 	def speed(self):
-		return np.abs(self._speed)
+		return abs(self._speed)
 	
 	def __str__(self):
 		return str(self.__class__) + ": " + str(self.__dict__)